@@ -1,6 +1,5 @@
 import copy
 from django.contrib.admin.widgets import ForeignKeyRawIdWidget
-from django.contrib.contenttypes.models import ContentType
 from django.template import TemplateDoesNotExist
 from django.template.loader import find_template
 from django.utils.functional import lazy
@@ -80,21 +79,27 @@ class DefaultPageChildAdmin(UrlNodeChildAdmin):
 
     @property
     def change_form_template(self):
-        templates = super(DefaultPageChildAdmin, self).change_form_template
-        opts = self.model._meta
-        app_label = opts.app_label
+        # The list is the same for every request, so it's only built once per model.
+        # A copy is returned, as subclasses may insert their own templates.
+        try:
+            templates = self._change_form_templates
+        except AttributeError:
+            opts = self.model._meta
+            app_label = opts.app_label
 
-        return [
-            "admin/fluent_pages/pagetypes/{0}/{1}/change_form.html".format(app_label, opts.object_name.lower()),
-            "admin/fluent_pages/pagetypes/{0}/change_form.html".format(app_label),
-        ] + templates
+            templates = self._change_form_templates = [
+                "admin/fluent_pages/pagetypes/{0}/{1}/change_form.html".format(app_label, opts.object_name.lower()),
+                "admin/fluent_pages/pagetypes/{0}/change_form.html".format(app_label),
+            ] + super(DefaultPageChildAdmin, self).change_form_template
+
+        return list(templates)
 
     def render_change_form(self, request, context, add=False, change=False, form_url='', obj=None):
         # Include a 'base_change_form_template' in the context, make it easier to extend
         context.update({
             'base_change_form_template': self.base_change_form_template,
             'default_change_form_template': _lazy_get_default_change_form_template(self),
-            'ct_id': long(ContentType.objects.get_for_model(obj).pk if change else request.GET['ct_id']) # HACK for polymorphic admin
+            'ct_id': long(obj.polymorphic_ctype_id if change else request.GET['ct_id']) # HACK for polymorphic admin
         })
         return super(DefaultPageChildAdmin, self).render_change_form(request, context, add=add, change=change, form_url=form_url, obj=obj)
 
@@ -109,6 +114,7 @@ _cached_name_lookups = {}
 def _select_template_name(template_name_list):
     """
     Given a list of template names, find the first one that exists.
+    Both found and missing templates are cached, the template directories don't change at runtime.
     """
     if not isinstance(template_name_list, tuple):
         template_name_list = tuple(template_name_list)
@@ -116,15 +122,18 @@ def _select_template_name(template_name_list):
     try:
         return _cached_name_lookups[template_name_list]
     except KeyError:
-        # Find which template of the template_names is selected by the Django loader.
-        for template_name in template_name_list:
-            try:
-                find_template(template_name)
-            except TemplateDoesNotExist:
-                continue
-            else:
-                template_name = unicode(template_name)  # consistent value for lazy() function.
-                _cached_name_lookups[template_name_list] = template_name
-                return template_name
-
-        return None
+        pass
+
+    # Find which template of the template_names is selected by the Django loader.
+    selected = None
+    for template_name in template_name_list:
+        try:
+            find_template(template_name)
+        except TemplateDoesNotExist:
+            continue
+        else:
+            selected = unicode(template_name)  # consistent value for lazy() function.
+            break
+
+    _cached_name_lookups[template_name_list] = selected
+    return selected
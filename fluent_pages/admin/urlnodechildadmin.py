@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib import admin
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from mptt.forms import MPTTAdminForm
 from polymorphic_tree.admin import PolymorphicMPTTChildModelAdmin
@@ -31,6 +32,7 @@ class UrlNodeAdminForm(MPTTAdminForm, TranslatableModelForm):
             TranslatableModelForm.__init__(self, *args, **kwargs)
         else:
             super(UrlNodeAdminForm, self).__init__(*args, **kwargs)
+        self._validated_slug = None
 
     def clean(self):
         """
@@ -40,50 +42,85 @@ class UrlNodeAdminForm(MPTTAdminForm, TranslatableModelForm):
         # As of Django 1.3, only valid fields are passed in cleaned_data.
         cleaned_data = super(UrlNodeAdminForm, self).clean()
 
-        # See if the current URLs don't overlap.
-        all_translations = UrlNode_Translation.objects.all()
-        if appsettings.FLUENT_PAGES_FILTER_SITE_ID:
-            site_id = (self.instance is not None and self.instance.parent_site_id) or settings.SITE_ID
-            all_translations = all_translations.filter(master__parent_site=site_id)
-
-        if self.instance and self.instance.id:
-            # Editing an existing page
-            current_id = self.instance.id
-            other_translations = all_translations.exclude(master_id=current_id)
-
-            # Get original unmodified parent value.
-            try:
-                parent = UrlNode.objects.non_polymorphic().get(children__pk=current_id)
-            except UrlNode.DoesNotExist:
-                parent = None
-        else:
-            # Creating new page!
-            parent = cleaned_data['parent']
-            other_translations = all_translations
-
         # If fields are filled in, and still valid, check for unique URL.
         # Determine new URL (note: also done in UrlNode model..)
         if cleaned_data.get('override_url'):
             new_url = cleaned_data['override_url']
 
-            if other_translations.filter(_cached_url=new_url).count():
+            if self._get_other_translations().filter(_cached_url=new_url).exists():
                 self._errors['override_url'] = self.error_class([_('This URL is already taken by an other page.')])
                 del cleaned_data['override_url']
 
         elif cleaned_data.get('slug'):
             new_slug = cleaned_data['slug']
-            if parent:
-                new_url = '%s%s/' % (parent._cached_url, new_slug)
+            parent_id = self._get_parent_id(cleaned_data)
+            parent_url = self._get_parent_url(parent_id)
+            if parent_url:
+                new_url = '%s%s/' % (parent_url, new_slug)
             else:
                 new_url = '/%s/' % new_slug
 
-            if other_translations.filter(_cached_url=new_url).count():
+            # Check both the URL and the slugs at the same level in a single query.
+            # Only a taken URL is an error. A duplicate slug (e.g. of a page with an override_url)
+            # is made unique by UrlNode._make_slug_unique() while saving, otherwise that check can be skipped.
+            other_urls = list(self._get_other_translations().filter(
+                Q(_cached_url=new_url) | Q(master__parent=parent_id, language_code=self.language_code, slug=new_slug)
+            ).values_list('_cached_url', flat=True))
+            if new_url in other_urls:
                 self._errors['slug'] = self.error_class([_('This slug is already used by an other page at the same level.')])
                 del cleaned_data['slug']
+            elif not other_urls:
+                self._validated_slug = (parent_url, parent_id, new_slug)
 
         return cleaned_data
 
 
+    def save_translated_fields(self, *args, **kwargs):
+        super(UrlNodeAdminForm, self).save_translated_fields(*args, **kwargs)
+
+        if self._validated_slug is not None:
+            # The translation exists now, let UrlNode.save() reuse the checks of clean().
+            parent_url, parent_id, slug = self._validated_slug
+            translation = self.instance._get_translated_model(self.language_code)
+            translation._fetched_parent_url = parent_url
+            translation._validated_slug = (parent_id, slug)
+
+
+    def _get_other_translations(self):
+        # All translations of the site, except the ones of the current page.
+        all_translations = UrlNode_Translation.objects.all()
+        if appsettings.FLUENT_PAGES_FILTER_SITE_ID:
+            site_id = (self.instance is not None and self.instance.parent_site_id) or settings.SITE_ID
+            all_translations = all_translations.filter(master__parent_site=site_id)
+
+        if self.instance and self.instance.id:
+            # Editing an existing page
+            return all_translations.exclude(master_id=self.instance.id)
+        else:
+            # Creating new page!
+            return all_translations
+
+
+    def _get_parent_id(self, cleaned_data):
+        # The instance is updated after clean(), so it still has the original parent.
+        if 'parent' in cleaned_data:
+            return cleaned_data['parent'].pk if cleaned_data['parent'] else None
+        else:
+            return self.instance.parent_id
+
+
+    def _get_parent_url(self, parent_id):
+        # Same as UrlNode_Translation.get_parent_cached_url(), reading both languages at once.
+        if parent_id is None:
+            return None
+
+        fallback = appsettings.FLUENT_PAGES_LANGUAGES.get_fallback_language(self.language_code)
+        parent_urls = dict(UrlNode_Translation.objects.filter(
+            master=parent_id, language_code__in=(self.language_code, fallback)
+        ).values_list('language_code', '_cached_url'))
+        return parent_urls.get(self.language_code) or parent_urls.get(fallback)
+
+
 
 class UrlNodeChildAdmin(PolymorphicMPTTChildModelAdmin, TranslatableAdmin):
     """
@@ -1,5 +1,15 @@
 import django
+import json
 from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.util import display_for_field
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.core.urlresolvers import reverse, NoReverseMatch
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.datastructures import SortedDict
+from django.utils.html import escape
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 from fluent_pages import appsettings
@@ -8,6 +18,9 @@ from parler.models import TranslationDoesNotExist
 from parler.utils import is_multilingual_project
 from polymorphic_tree.admin import PolymorphicMPTTParentModelAdmin, NodeTypeChoiceForm
 from fluent_pages.models import UrlNode
+from fluent_pages.models.caches import get_page_choices
+from fluent_pages.models.publishing import bulk_publish, bulk_unpublish
+from fluent_pages.utils.compat import url
 
 
 
@@ -36,6 +49,25 @@ else:
     extra_list_filters = (PageTypeListFilter,)
 
 
+class LazyTreeChangeList(ChangeList):
+    """
+    The change list for the lazily loaded tree.
+    Only the root nodes are fetched, the tree is loaded client-side from :func:`UrlNodeParentAdmin.api_tree_nodes_view`.
+    """
+    lazy_tree = True
+
+    def get_queryset(self, request):
+        if django.VERSION >= (1, 6):
+            qs = super(LazyTreeChangeList, self).get_queryset(request)
+        else:
+            qs = super(LazyTreeChangeList, self).get_query_set(request)
+        return qs.filter(parent__isnull=True)
+
+    def get_query_set(self, request):
+        # Django 1.4/1.5 name of the method
+        return self.get_queryset(request)
+
+
 class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
     """
     The internal machinery
@@ -51,7 +83,14 @@ class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
         list_display = ('title', 'status_column', 'modification_date', 'actions_column')
     list_filter = ('status',) + extra_list_filters
     search_fields = ('translations__slug', 'translations__title')
-    actions = ['make_published']
+    actions = ['make_published', 'make_unpublished']
+
+    #: Load the child nodes of the tree on demand, instead of rendering the complete tree.
+    #: This is useful for sites with many pages. Searching and filtering still displays the regular list.
+    lazy_tree = appsettings.FLUENT_PAGES_ADMIN_LAZY_TREE
+
+    #: The maximum number of suggestions in the page autocomplete widget.
+    max_page_choices = 50
 
     class Media:
         css = {
@@ -66,7 +105,9 @@ class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
         # until there is decent filtering for it.
         if appsettings.FLUENT_PAGES_FILTER_SITE_ID:
             qs = qs.filter(parent_site=settings.SITE_ID)
-        return qs
+
+        # The list doesn't display contents, avoid fetching it when polymorphic_list is enabled.
+        return qs.defer_heavy_fields()
 
 
     # ---- Polymorphic tree overrides ----
@@ -100,6 +141,19 @@ class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
         return choices
 
 
+    def get_urls(self):
+        """
+        Add the URL for the lazily loaded tree.
+        """
+        base_urls = super(UrlNodeParentAdmin, self).get_urls()
+        info = self.model._meta.app_label, self.model._meta.module_name
+        extra_urls = [
+            url(r'^api/tree-nodes/$', self.admin_site.admin_view(self.api_tree_nodes_view), name='{0}_{1}_tree_nodes'.format(*info)),
+            url(r'^api/page-choices/$', self.admin_site.admin_view(self.api_page_choices_view), name='{0}_{1}_page_choices'.format(*info)),
+        ]
+        return extra_urls + base_urls
+
+
     # Provide some migration assistance for the users of the 0.8.1 alpha release:
     def get_child_model_classes(self):
         raise DeprecationWarning("Please upgrade django-polymorphic-tree to 0.8.2 to use this version of django-fluent-pages.")
@@ -117,9 +171,11 @@ class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
     )
 
     def status_column(self, urlnode):
-        status = urlnode.status
-        title = [rec[1] for rec in UrlNode.STATUSES if rec[0] == status].pop()
-        icon  = [rec[1] for rec in self.STATUS_ICONS if rec[0] == status].pop()
+        return self._get_status_icon(urlnode.status)
+
+    def _get_status_icon(self, status):
+        title = dict(UrlNode.STATUSES)[status]
+        icon  = dict(self.STATUS_ICONS)[status]
         if django.VERSION >= (1, 4):
             admin = settings.STATIC_URL + 'admin/img/'
         else:
@@ -151,16 +207,198 @@ class UrlNodeParentAdmin(TranslatableAdmin, PolymorphicMPTTParentModelAdmin):
         return language_code.upper()
 
 
+    # ---- Page selection ----
+
+    def api_page_choices_view(self, request):
+        """
+        Return the pages which contain the ``q`` parameter in their title.
+        This provides the suggestions of the :class:`~fluent_pages.forms.widgets.PageAutocompleteWidget`.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        query = request.GET.get('q', '').strip().lower()
+        choices = [
+            {'id': pk, 'level': level, 'title': title}
+            for pk, level, title in get_page_choices()
+            if query in title.lower()
+        ]
+        return HttpResponse(json.dumps(choices[:self.max_page_choices]), content_type='application/json')
+
+
+    # ---- Lazy tree ----
+
+    def use_lazy_tree(self, request):
+        """
+        Whether the tree is loaded on demand. Searching, filtering or popups display the regular list.
+        """
+        return self.lazy_tree and not request.GET
+
+
+    def get_changelist(self, request, **kwargs):
+        if self.use_lazy_tree(request):
+            return LazyTreeChangeList
+        return super(UrlNodeParentAdmin, self).get_changelist(request, **kwargs)
+
+
+    @property
+    def api_tree_nodes_view_url(self):
+        # Provided for result list template
+        info = self.model._meta.app_label, self.model._meta.module_name
+        return reverse('admin:{0}_{1}_tree_nodes'.format(*info))
+
+
+    def api_tree_nodes_view(self, request):
+        """
+        Return the child nodes of the ``parent`` parameter (or the root nodes) in the JSON format of jqTree.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+        try:
+            parent_id = long(request.GET['parent']) if request.GET.get('parent') else None
+        except ValueError as e:
+            return HttpResponse(json.dumps({'error': str(e)}), content_type='application/json', status=400)
+
+        return HttpResponse(json.dumps(self.get_tree_nodes(request, parent_id)), content_type='application/json')
+
+
+    def get_tree_nodes(self, request, parent_id=None):
+        """
+        Return the data of the child nodes.
+        All columns are calculated from a single query on the nodes and their translations,
+        the page type models are not fetched.
+        """
+        from fluent_pages.extensions import page_type_pool
+        plugins = dict((plugin.type_id, plugin) for plugin in page_type_pool.get_plugins())
+
+        # The translations are joined, so nodes without any translation are also returned.
+        rows = self.queryset(request).filter(parent=parent_id).non_polymorphic() \
+            .order_by('tree_id', 'lft') \
+            .values_list(
+                'pk', 'polymorphic_ctype', 'status', 'modification_date', 'lft', 'rght',
+                'translations__language_code', 'translations__title', 'translations___cached_url'
+            )
+
+        # Same title as the regular list displays: the current language, the fallback, the default or any language.
+        language_code = translation.get_language()
+        fallback = appsettings.FLUENT_PAGES_LANGUAGES.get_fallback_language(language_code)
+        priority = {language_code: 3, fallback: 2, appsettings.FLUENT_PAGES_DEFAULT_LANGUAGE_CODE: 1}
+        nodes = SortedDict()
+        for pk, ctype_id, status, modification_date, lft, rght, code, title, cached_url in rows:
+            node = nodes.get(pk)
+            if node is None:
+                node = nodes[pk] = {
+                    'id': pk,
+                    'ctype_id': ctype_id,
+                    'status': status,
+                    'modification_date': modification_date,
+                    'is_leaf': (rght - lft == 1),
+                    'languages': [],
+                    'title': u'',
+                    'title_priority': -1,
+                    'cached_url': None,
+                }
+
+            if code is None:
+                continue  # no translations at all
+
+            node['languages'].append(code)
+            if priority.get(code, 0) > node['title_priority']:
+                node['title'] = title
+                node['title_priority'] = priority.get(code, 0)
+            if code == language_code:
+                node['cached_url'] = cached_url
+
+        try:
+            url_root = reverse('fluent-page').rstrip('/')
+        except NoReverseMatch:
+            url_root = None
+
+        return [self._get_tree_node_data(data, plugins.get(data['ctype_id']), url_root) for data in nodes.itervalues()]
+
+
+    def _get_tree_node_data(self, node, plugin, url_root):
+        # Generate the same structure as the jqTree data in admin/polymorphic_tree/jstree_list_results.html
+        can_have_children = bool(plugin and plugin.can_have_children and not plugin.is_file)
+        columns = []
+        for name in self.list_display[1:]:
+            if name == 'language_column':
+                value = u'<span class="available-languages">{0}</span>'.format(u' '.join(self.get_language_short_title(code) for code in sorted(node['languages'])))
+            elif name == 'status_column':
+                value = self._get_status_icon(node['status'])
+            elif name == 'modification_date':
+                value = escape(display_for_field(node['modification_date'], UrlNode._meta.get_field('modification_date')))
+            elif name == 'actions_column':
+                value = u' '.join(self._get_tree_node_actions(node, can_have_children, url_root))
+            else:
+                value = u''
+            columns.append(u'<div class="col col-{0}">{1}</div>'.format(name, value))
+
+        data = {
+            'id': node['id'],
+            'classes': u'nodetype-{0}'.format(plugin.model._meta.object_name.lower() if plugin else ''),
+            'can_have_children': can_have_children,
+            'label': u'<div class="col-primary{leaf}"><div class="col first-column"><a href="{id}/">{title}</a></div></div><div class="col-metadata">{columns}</div>'.format(
+                leaf=' leaf' if node['is_leaf'] else '', id=node['id'], title=escape(node['title']), columns=u''.join(columns)
+            ),
+        }
+        if not node['is_leaf']:
+            # The placeholder gives the node an "open" button, the children are fetched when the node is opened.
+            data['children'] = [{'id': 'placeholder-{0}'.format(node['id']), 'label': u'\u2026', 'is_placeholder': True}]
+        return data
+
+
+    def _get_tree_node_actions(self, node, can_have_children, url_root):
+        # Same as get_action_icons(), using the precomputed data.
+        actions = []
+        if can_have_children:
+            actions.append(
+                u'<a href="add/?{parent_attr}={id}" title="{title}" class="add-child-object"><img src="{static}polymorphic_tree/icons/page_new.gif" width="16" height="16" alt="{title}" /></a>'.format(
+                    parent_attr=self.model._mptt_meta.parent_attr, id=node['id'], title=_('Add sub node'), static=settings.STATIC_URL)
+            )
+        else:
+            actions.append(self.EMPTY_ACTION_ICON.format(STATIC_URL=settings.STATIC_URL, css_class='add-child-object'))
+
+        if node['status'] == UrlNode.PUBLISHED and node['cached_url'] is not None and url_root is not None:
+            actions.append(
+                u'<a href="{url}" title="{title}" target="_blank"><img src="{static}polymorphic_tree/icons/world.gif" width="16" height="16" alt="{title}" /></a>'.format(
+                    url=escape(url_root + node['cached_url']), title=_('View on site'), static=settings.STATIC_URL)
+            )
+
+        move_up = u'<a href="{0}/move_up/" class="move-up">\u2191</a>'.format(node['id'])
+        move_down = u'<a href="{0}/move_down/" class="move-down">\u2193</a>'.format(node['id'])
+        actions.append(u'<span class="no-js">{0}{1}</span>'.format(move_up, move_down))
+        return actions
+
+
     # ---- Bulk actions ----
 
     def make_published(self, request, queryset):
-        rows_updated = queryset.update(status=UrlNode.PUBLISHED)
+        result = bulk_publish(queryset)  # also clears the caches.
 
-        if rows_updated == 1:
+        if result.updated == 1:
             message = "1 page was marked as published."
         else:
-            message = "{0} pages were marked as published.".format(rows_updated)
+            message = "{0} pages were marked as published.".format(result.updated)
         self.message_user(request, message)
 
+        if result.invalid_ids:
+            message = "{0} pages were not published, because their publication end date has passed or is before the publication date.".format(len(result.invalid_ids))
+            messages.warning(request, message)  # message_user() has no level before Django 1.5
+
 
     make_published.short_description = _("Mark selected objects as published")
+
+
+    def make_unpublished(self, request, queryset):
+        result = bulk_unpublish(queryset)
+
+        if result.updated == 1:
+            message = "1 page was marked as draft."
+        else:
+            message = "{0} pages were marked as draft.".format(result.updated)
+        self.message_user(request, message)
+
+
+    make_unpublished.short_description = _("Mark selected objects as draft")
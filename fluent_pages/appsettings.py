@@ -22,7 +22,30 @@ FLUENT_PAGES_DEFAULT_LANGUAGE_CODE = getattr(settings, 'FLUENT_PAGES_DEFAULT_LAN
 FLUENT_PAGES_LANGUAGES = getattr(settings, 'FLUENT_PAGES_LANGUAGES', parler_appsettings.PARLER_LANGUAGES)
 
 # Performance settings
-FLUENT_PAGES_PREFETCH_TRANSLATIONS = getattr(settings, 'FLUENT_PAGES_PREFETCH_TRANSLATIONS', False)
+FLUENT_PAGES_PREFETCH_TRANSLATIONS = getattr(settings, 'FLUENT_PAGES_PREFETCH_TRANSLATIONS', True)
+FLUENT_PAGES_WARM_CACHES_ON_MIGRATE = getattr(settings, 'FLUENT_PAGES_WARM_CACHES_ON_MIGRATE', False)
+FLUENT_PAGES_USE_PAGE_ROUTES = getattr(settings, 'FLUENT_PAGES_USE_PAGE_ROUTES', False)
+FLUENT_PAGES_CACHE_PAGE_TREE = getattr(settings, 'FLUENT_PAGES_CACHE_PAGE_TREE', False)  # requires a cache backend that is shared between processes
+FLUENT_PAGES_USE_IS_LIVE = getattr(settings, 'FLUENT_PAGES_USE_IS_LIVE', False)  # requires running the update_live_pages command
+
+# Invalidation of process-local caches
+FLUENT_PAGES_INVALIDATION_BUS = getattr(settings, 'FLUENT_PAGES_INVALIDATION_BUS', 'fluent_pages.invalidation.bus.CacheGenerationBus')
+FLUENT_PAGES_INVALIDATION_POLL_INTERVAL = getattr(settings, 'FLUENT_PAGES_INVALIDATION_POLL_INTERVAL', 1000)  # in milliseconds
+FLUENT_PAGES_INVALIDATION_SOCKET_DIR = getattr(settings, 'FLUENT_PAGES_INVALIDATION_SOCKET_DIR', None)
+
+# Static sitemap files
+FLUENT_PAGES_SITEMAP_DIR = getattr(settings, 'FLUENT_PAGES_SITEMAP_DIR', None)
+FLUENT_PAGES_SITEMAP_WRITE_ON_SAVE = getattr(settings, 'FLUENT_PAGES_SITEMAP_WRITE_ON_SAVE', False)
+FLUENT_PAGES_SITEMAP_SENDFILE_HEADER = getattr(settings, 'FLUENT_PAGES_SITEMAP_SENDFILE_HEADER', None)  # e.g. X-Sendfile or X-Accel-Redirect
+FLUENT_PAGES_SITEMAP_SENDFILE_URL = getattr(settings, 'FLUENT_PAGES_SITEMAP_SENDFILE_URL', None)  # internal location for X-Accel-Redirect
+
+# Instrumentation of the page dispatcher
+FLUENT_PAGES_STATS_BACKEND = getattr(settings, 'FLUENT_PAGES_STATS_BACKEND', None)  # e.g. 'fluent_pages.views.instrumentation.StatsdBackend'
+FLUENT_PAGES_SERVER_TIMING = getattr(settings, 'FLUENT_PAGES_SERVER_TIMING', False)  # add the Server-Timing header
+
+# Admin
+FLUENT_PAGES_ADMIN_LAZY_TREE = getattr(settings, 'FLUENT_PAGES_ADMIN_LAZY_TREE', False)
+FLUENT_PAGES_BULK_CHUNK_SIZE = getattr(settings, 'FLUENT_PAGES_BULK_CHUNK_SIZE', 500)  # pages per transaction in the publish actions
 
 # Advanced settings
 FLUENT_PAGES_FILTER_SITE_ID = getattr(settings, 'FLUENT_PAGES_FILTER_SITE_ID', True)
@@ -44,6 +67,9 @@ else:
     if not os.path.exists(FLUENT_PAGES_TEMPLATE_DIR):
         raise ImproperlyConfigured("The path '{0}' in the setting '{1}' does not exist!".format(FLUENT_PAGES_TEMPLATE_DIR, settingName))
 
+if FLUENT_PAGES_SITEMAP_DIR and not os.path.isabs(FLUENT_PAGES_SITEMAP_DIR):
+    raise ImproperlyConfigured("The setting 'FLUENT_PAGES_SITEMAP_DIR' needs to be an absolute path!")
+
 
 # Clean settings
 FLUENT_PAGES_DEFAULT_LANGUAGE_CODE = normalize_language_code(FLUENT_PAGES_DEFAULT_LANGUAGE_CODE)
@@ -71,3 +97,14 @@ def get_language_settings(language_code, site_id=None):
             return lang_dict
 
     return FLUENT_PAGES_LANGUAGES['default']
+
+
+def get_language_codes(site_id=None):
+    """
+    Return the language codes which are configured for a site.
+    """
+    if site_id is None:
+        site_id = settings.SITE_ID
+
+    codes = [lang_dict['code'] for lang_dict in FLUENT_PAGES_LANGUAGES.get(site_id, ())]
+    return codes or [FLUENT_PAGES_DEFAULT_LANGUAGE_CODE]
@@ -101,6 +101,10 @@ class PageTypePlugin(object):
     #: The sorting priority for the page type in the "Add Page" dialog of the admin.
     sort_priority = 100
 
+    #: Defines the model fields which are only needed to render the page, e.g. large text fields.
+    #: These fields are deferred when the pages are listed in the menu or admin, and loaded on first access.
+    heavy_fields = ()
+
 
     def __init__(self):
         self._type_id = None
@@ -208,6 +212,16 @@ class PageTypePlugin(object):
         return self._url_resolver
 
 
+    def get_dependent_cache_keys(self, page):
+        """
+        .. versionadded:: 0.9
+
+        Return the cache keys which need to be cleared when the page is saved, moved or deleted.
+        These keys are removed together with the other page caches, see :mod:`fluent_pages.invalidation`.
+        """
+        return ()
+
+
 # -------- API to access plugins --------
 
 class PageTypeAlreadyRegistered(Exception):
@@ -238,6 +252,7 @@ class PageTypePool(object):
         self._file_types = None
         self._folder_types = None
         self._url_types = None
+        self._heavy_fields = None
 
 
     def register(self, plugin):
@@ -262,6 +277,7 @@ class PageTypePool(object):
         self._folder_types = None
         self._file_types = None
         self._url_types = None
+        self._heavy_fields = None
 
         # Make a single static instance, similar to ModelAdmin.
         plugin_instance = plugin()
@@ -376,6 +392,22 @@ class PageTypePool(object):
         return plugins
 
 
+    def get_heavy_fields(self):
+        """
+        Return the :attr:`~PageTypePlugin.heavy_fields` of all page types,
+        as dictionary of :class:`~django.contrib.contenttypes.models.ContentType` id's to a ``(model, fields)`` tuple.
+        Page types without heavy fields are not included.
+        """
+        if self._heavy_fields is None:
+            heavy_fields = {}
+            for plugin in self.get_plugins():
+                if plugin.heavy_fields:
+                    heavy_fields[plugin.type_id] = (plugin.model, tuple(plugin.heavy_fields))
+            self._heavy_fields = heavy_fields  # heavy_fields is reset during plugin scan.
+
+        return self._heavy_fields
+
+
     def _import_plugins(self):
         """
         Internal function, ensure all plugin packages are imported.
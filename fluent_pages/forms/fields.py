@@ -8,20 +8,35 @@ from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from mptt.forms import TreeNodeChoiceField
 from fluent_pages import appsettings
+from fluent_pages.forms.widgets import PageAutocompleteWidget
+from fluent_pages.utils.templatefiles import get_template_choices
 import os
+import re
 
 
 class TemplateFilePathField(forms.FilePathField):
     """
     The associated formfield to select a template path.
     """
-    def __init__(self, *args, **kwargs):
-        super(TemplateFilePathField, self).__init__(*args, **kwargs)
+    def __init__(self, path, match=None, recursive=False, allow_files=True, allow_folders=False, **kwargs):
+        # Skip FilePathField.__init__(), which lists the directory. The listing is read from the cache instead.
+        # The allow_files/allow_folders options are only passed by Django 1.5+
+        self.path, self.match, self.recursive = path, match, recursive
+        self.allow_files, self.allow_folders = allow_files, allow_folders
+        if match is not None:
+            self.match_re = re.compile(match)
+        forms.ChoiceField.__init__(self, choices=(), **kwargs)
+
+        choices = list(get_template_choices(path, match, recursive, allow_files, allow_folders))
 
         # Make choices relative if requested.
         if appsettings.FLUENT_PAGES_RELATIVE_TEMPLATE_DIR:
-            self.choices.sort(key=lambda choice: choice[1])
-            self.choices = self.widget.choices = [(filename.replace(self.path, '', 1), title) for filename, title in self.choices]
+            choices.sort(key=lambda choice: choice[1])
+            choices = [(filename.replace(self.path, '', 1), title) for filename, title in choices]
+
+        if not self.required:
+            choices.insert(0, ("", "---------"))
+        self.choices = choices  # also updates the widget choices.
 
     def prepare_value(self, value):
         """
@@ -67,9 +82,15 @@ class RelativeRootPathField(forms.CharField):
 class PageChoiceField(TreeNodeChoiceField):
     """
     A SelectBox that displays the pages QuerySet, with items indented.
+
+    Unless a custom queryset is given, the choices are read from :func:`~fluent_pages.models.caches.get_page_choices`,
+    which is renewed when the page tree changes. Use ``autocomplete=True`` to fetch the pages while typing,
+    instead of rendering all pages in the select box.
     """
 
     def __init__(self, *args, **kwargs):
+        if kwargs.pop('autocomplete', False):
+            kwargs.setdefault('widget', PageAutocompleteWidget)
         if not args and not kwargs.has_key('queryset'):
             from fluent_pages.models import UrlNode
             kwargs['queryset'] = UrlNode.objects.published().non_polymorphic()
@@ -90,6 +111,37 @@ class PageChoiceField(TreeNodeChoiceField):
 
         return new_self
 
+    def _get_choices(self):
+        if hasattr(self, '_choices') or self.custom_qs:
+            return super(PageChoiceField, self)._get_choices()
+        else:
+            # Read the cached list, only when the choices are actually displayed.
+            return CachedPageChoiceIterator(self)
+
+    choices = property(_get_choices, forms.ChoiceField._set_choices)
+
     def label_from_instance(self, page):
         page_title = page.title or page.slug  # TODO: menu title?
-        return mark_safe(u"%s %s" % (u"&nbsp;&nbsp;" * page.level, escape(page_title)))
+        return self._get_label(page.level, page_title)
+
+    def _get_label(self, level, page_title):
+        return mark_safe(u"%s %s" % (u"&nbsp;&nbsp;" * level, escape(page_title)))
+
+
+class CachedPageChoiceIterator(object):
+    """
+    The choices of the :class:`PageChoiceField`, read from the cached list of pages.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def __iter__(self):
+        from fluent_pages.models.caches import get_page_choices
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for pk, level, title in get_page_choices():
+            yield (pk, self.field._get_label(level, title))
+
+    def __len__(self):
+        from fluent_pages.models.caches import get_page_choices
+        return len(get_page_choices()) + (1 if self.field.empty_label is not None else 0)
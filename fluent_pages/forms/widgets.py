@@ -0,0 +1,45 @@
+"""
+Extra form widgets.
+"""
+from django import forms
+from django.core.urlresolvers import reverse
+from django.forms.util import flatatt
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext_lazy as _
+from fluent_pages.utils.compat import force_unicode
+
+__all__ = ('PageAutocompleteWidget',)
+
+
+class PageAutocompleteWidget(forms.Widget):
+    """
+    A widget to select a page, which fetches the matching pages while typing.
+    Unlike a select box, the pages are not included in the HTML.
+    The suggestions are read from the ``api/page-choices/`` view of the page admin.
+    """
+    url_name = 'admin:fluent_pages_page_page_choices'
+
+    class Media:
+        css = {
+            'all': ('fluent_pages/admin/page_autocomplete.css',)
+        }
+        js = ('fluent_pages/admin/page_autocomplete.js',)
+
+    def render(self, name, value, attrs=None):
+        from fluent_pages.models.caches import get_page_choices
+        final_attrs = self.build_attrs(attrs, type='hidden', name=name)
+        if value not in (None, ''):
+            final_attrs['value'] = force_unicode(value)
+
+        # Display the title of the current page.
+        title = u''
+        if value not in (None, ''):
+            titles = dict((force_unicode(pk), page_title) for pk, level, page_title in get_page_choices())
+            title = titles.get(force_unicode(value), u'')
+
+        # Not using format_html(), which requires Django 1.5
+        return mark_safe(u'<input{0} /><input type="text" class="vPageAutocomplete" value="{1}" placeholder="{2}" data-for="{3}" data-url="{4}" />'.format(
+            flatatt(final_attrs), conditional_escape(title), conditional_escape(_('Search page')),
+            conditional_escape(final_attrs.get('id', '')), conditional_escape(reverse(self.url_name))
+        ))
@@ -0,0 +1,323 @@
+"""
+Invalidation of the cache keys which depend on the page tree.
+
+Cache keys are collected while pages are saved, moved or deleted.
+When all changes are done, the unique keys are removed at once using ``cache.delete_many()``.
+For example:
+
+.. code-block:: python
+
+    from fluent_pages.invalidation import invalidation_batch
+
+    with invalidation_batch():
+        for page in pages:
+            page.save()    # the cache is cleared once, after all pages are saved.
+
+Additional cache keys can be registered using :func:`register_dependent_keys`,
+or by overriding :func:`PageTypePlugin.get_dependent_cache_keys() <fluent_pages.extensions.PageTypePlugin.get_dependent_cache_keys>`.
+
+Caches which are derived from the whole page tree (e.g. routes or menus) should include
+the tree generation in their cache key instead, using :func:`get_tree_cache_key`.
+The generation is increased each time a page of the site changes,
+so all previous keys are no longer used, regardless of how many keys exist.
+Process-local caches can be cleared using the :mod:`fluent_pages.invalidation.bus`.
+"""
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, DEFAULT_DB_ALIAS
+
+__all__ = (
+    'invalidation_batch', 'expire_page_caches', 'expire_queryset_caches', 'expire_cache_keys',
+    'get_dependent_cache_keys', 'register_dependent_keys',
+    'get_tree_generation', 'bump_tree_generation', 'get_tree_cache_key',
+)
+
+_dependent_key_functions = []
+_GENERATION_TIMEOUT = 30 * 86400  # The generation is read all the time, should not expire soon.
+_state = threading.local()
+
+
+def register_dependent_keys(func):
+    """
+    Register a function that returns the cache keys which need to be cleared when a page changes.
+    The function receives the page as argument, and should return a list of cache keys.
+    This can be used as decorator.
+    """
+    if func not in _dependent_key_functions:
+        _dependent_key_functions.append(func)
+    return func
+
+
+def get_dependent_cache_keys(page):
+    """
+    Return all cache keys which depend on the given page.
+    """
+    from fluent_pages.extensions import PageTypeNotFound
+
+    keys = set()
+    for func in _dependent_key_functions:
+        keys.update(func(page))
+
+    try:
+        plugin = page.plugin
+    except PageTypeNotFound:
+        pass
+    else:
+        keys.update(plugin.get_dependent_cache_keys(page))
+
+    return keys
+
+
+def expire_page_caches(page):
+    """
+    Clear all cache keys which depend on the given page, and increase the tree generation of it's site.
+    Inside an :func:`invalidation_batch`, the keys are cleared when the batch ends.
+    """
+    expire_cache_keys(get_dependent_cache_keys(page))
+    bump_tree_generation(page.parent_site_id)
+
+
+def expire_queryset_caches(queryset):
+    """
+    Clear the caches for all pages in the queryset, for bulk ``update()`` and ``delete()`` operations.
+
+    As the page objects are not fetched, only the caches which depend on the page type are cleared,
+    and the tree generation of the affected sites is increased.
+    The :func:`register_dependent_keys` functions are not called.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from fluent_pages.urlresolvers import _get_pages_of_type_cache_key
+
+    rows = queryset.order_by().values_list('parent_site', 'polymorphic_ctype').distinct()
+    keys = set()
+    site_ids = set()
+    for site_id, ctype_id in rows:
+        site_ids.add(site_id)
+        try:
+            model = ContentType.objects.get_for_id(ctype_id).model_class()
+        except ContentType.DoesNotExist:
+            model = None
+        if model is not None:  # stale content type
+            keys.add(_get_pages_of_type_cache_key(model))
+
+    with invalidation_batch():
+        expire_cache_keys(keys)
+        for site_id in site_ids:
+            bump_tree_generation(site_id)
+
+
+def expire_cache_keys(keys):
+    """
+    Clear the given cache keys.
+    Inside an :func:`invalidation_batch`, the keys are cleared when the batch ends.
+    """
+    if getattr(_state, 'depth', 0):
+        _state.keys.update(keys)
+    elif keys:
+        cache.delete_many(list(keys))
+
+
+class invalidation_batch(object):
+    """
+    Collect all cache keys that need to be cleared, and remove them when the outermost batch ends.
+    This can be used as decorator and context manager.
+
+    Inside a transaction, the keys are removed after the transaction is committed,
+    so other processes can't cache the old values again before the changes are visible.
+    """
+    def __enter__(self):
+        if not getattr(_state, 'depth', 0):
+            _state.depth = 0
+            _state.keys = set()
+            _state.site_ids = set()
+        _state.depth += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.depth -= 1
+        if _state.depth == 0:
+            keys = _state.keys
+            site_ids = _state.site_ids
+            _state.keys = set()
+            _state.site_ids = set()
+            # Even after an error, the keys are cleared; the cache may already contain partially updated data.
+            if keys or site_ids:
+                _flush_on_commit(keys, site_ids)
+
+    def __call__(self, func):
+        @wraps(func)
+        def _inner(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return _inner
+
+
+def _flush_on_commit(keys, site_ids):
+    if _get_transaction_depth() > _committed_depth:
+        # Wait until the transaction is committed or rolled back.
+        # After a rollback, the keys are still cleared, as this process could have cached the uncommitted data.
+        _install_commit_hooks()
+        _state.pending_keys = getattr(_state, 'pending_keys', set()) | set(keys)
+        _state.pending_site_ids = getattr(_state, 'pending_site_ids', set()) | set(site_ids)
+    else:
+        _flush(keys, site_ids)
+
+
+def _flush(keys, site_ids):
+    if keys:
+        cache.delete_many(list(keys))
+    for site_id in site_ids:
+        _incr_tree_generation(site_id)
+
+
+def _run_on_commit(func):
+    """
+    Call the function after the transaction is committed, or immediately outside a transaction.
+    The function is not called when the transaction (or savepoint) it was registered in is rolled back.
+    """
+    depth = _get_transaction_depth()
+    if depth > _committed_depth:
+        _install_commit_hooks()
+        _state.pending_callbacks = getattr(_state, 'pending_callbacks', []) + [(depth, func)]
+    else:
+        func()
+
+
+def _flush_pending(rolled_back=False, closed=False):
+    depth = _get_transaction_depth()
+    callbacks = getattr(_state, 'pending_callbacks', [])
+    if rolled_back:
+        # Forget the callbacks of the transaction or savepoint that ended.
+        callbacks = [] if closed else [(d, func) for d, func in callbacks if d <= depth]
+    else:
+        # The callbacks of a released savepoint now belong to the enclosing block.
+        callbacks = [(min(d, depth), func) for d, func in callbacks]
+    _state.pending_callbacks = callbacks
+
+    if depth > _committed_depth and not closed:
+        return  # Still inside the outer transaction.
+
+    keys = getattr(_state, 'pending_keys', None)
+    site_ids = getattr(_state, 'pending_site_ids', None)
+    _state.pending_keys = set()
+    _state.pending_site_ids = set()
+    _state.pending_callbacks = []
+    if keys or site_ids:
+        _flush(keys, site_ids)
+    for d, func in callbacks:
+        func()
+
+
+# The transaction depth which counts as committed. The test runner raises this,
+# as each test runs inside a transaction which is never committed.
+_committed_depth = 0
+
+
+def _get_transaction_depth():
+    if hasattr(connection, 'in_atomic_block'):
+        # Django 1.6 atomic blocks, the nested blocks are savepoints.
+        # A block without savepoint (e.g. in Model.delete()) is part of the enclosing block, its ID is None.
+        if not connection.in_atomic_block:
+            return 0
+        return 1 + len([sid for sid in connection.savepoint_ids if sid is not None])
+    else:
+        # Django 1.4/1.5 transaction management
+        return 1 if connection.is_managed() else 0
+
+
+def _install_commit_hooks():
+    """
+    Let the database connection of this thread report when a transaction or savepoint ends.
+    Django 1.6 has no ``on_commit()`` callbacks, so the methods are wrapped instead.
+    """
+    conn = connections[DEFAULT_DB_ALIAS]
+    if getattr(conn, '_fluent_pages_commit_hooks', False):
+        return
+
+    def _wrap(method, rolled_back=False, closed=False):
+        @wraps(method)
+        def _inner(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _flush_pending(rolled_back, closed)
+        return _inner
+
+    if hasattr(conn, 'in_atomic_block'):
+        conn.commit = _wrap(conn.commit)
+        conn.savepoint_commit = _wrap(conn.savepoint_commit)
+        conn.rollback = _wrap(conn.rollback, rolled_back=True)
+        conn.savepoint_rollback = _wrap(conn.savepoint_rollback, rolled_back=True)
+    else:
+        # Django 1.4/1.5 commit the whole transaction, also inside a nested commit_on_success block.
+        # As is_managed() is still True during the commit, the transaction is marked as closed explicitly.
+        # Leaving a managed block without changes doesn't commit, that is handled by leave_transaction_management().
+        conn.commit = _wrap(conn.commit, closed=True)
+        conn.rollback = _wrap(conn.rollback, rolled_back=True, closed=True)
+        conn.leave_transaction_management = _wrap(conn.leave_transaction_management)
+    conn._fluent_pages_commit_hooks = True
+
+
+def _get_generation_key(site_id):
+    return 'fluent_pages.tree_generation.{0}'.format(site_id or settings.SITE_ID)
+
+
+def get_tree_generation(site_id=None):
+    """
+    Return the current generation number of the page tree.
+    This number changes each time a page of the site is saved, moved or deleted.
+    """
+    key = _get_generation_key(site_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Start with a time based value, so a generation that was evicted from the cache
+        # doesn't start at a number which was used before.
+        cache.add(key, int(time.time() * 1000), timeout=_GENERATION_TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_tree_generation(site_id=None):
+    """
+    Increase the generation number of the page tree, so all :func:`get_tree_cache_key` keys are renewed.
+    Inside an :func:`invalidation_batch`, the number is increased once when the batch ends.
+    """
+    if getattr(_state, 'depth', 0):
+        _state.site_ids.add(site_id or settings.SITE_ID)
+    else:
+        _incr_tree_generation(site_id)
+
+
+def _incr_tree_generation(site_id):
+    from fluent_pages.invalidation.bus import get_invalidation_bus
+    key = _get_generation_key(site_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key is not set, start a new generation.
+        cache.add(key, int(time.time() * 1000), timeout=_GENERATION_TIMEOUT)
+
+    # Let the process-local caches of all processes know about the change.
+    get_invalidation_bus().publish(site_id or settings.SITE_ID)
+
+
+def get_tree_cache_key(name, site_id=None, *args):
+    """
+    Return a cache key which includes the generation of the page tree.
+    For example, ``get_tree_cache_key('menu', None, language_code)`` returns ``fluent_pages.menu.4.1400000000000.en``.
+    """
+    if site_id is None:
+        site_id = settings.SITE_ID
+    parts = ['fluent_pages', name, site_id, get_tree_generation(site_id)]
+    parts.extend(args)
+    return '.'.join(str(part) for part in parts)
+
+
+@register_dependent_keys
+def _get_app_reverse_keys(page):
+    # The cache of urlresolvers._get_pages_of_type()
+    from fluent_pages.urlresolvers import _get_pages_of_type_cache_key
+    model = page._meta.proxy_for_model if page._deferred else page.__class__
+    return [_get_pages_of_type_cache_key(model)]
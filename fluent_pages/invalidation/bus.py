@@ -0,0 +1,260 @@
+"""
+Notifying all processes about changes in the page tree.
+
+Processes can keep their own in-memory caches (e.g. a dictionary of routes),
+as long as they clear them when the bus reports a change:
+
+.. code-block:: python
+
+    from fluent_pages.invalidation.bus import get_invalidation_bus
+
+    _routes = {}
+
+    def _clear_routes(site_id):
+        _routes.pop(site_id, None)
+
+    get_invalidation_bus().connect(_clear_routes)
+
+The bus is polled at the start of every request.
+Code which runs outside the request/response cycle can call :func:`~BaseInvalidationBus.poll` directly.
+
+The backend is configured with the ``FLUENT_PAGES_INVALIDATION_BUS`` setting:
+
+* :class:`CacheGenerationBus` (the default) reads the tree generation from the cache,
+  at most once per ``FLUENT_PAGES_INVALIDATION_POLL_INTERVAL`` milliseconds.
+* :class:`PostgresNotifyBus` uses the ``LISTEN``/``NOTIFY`` feature of PostgreSQL.
+* :class:`UnixSocketBus` sends datagrams to the other processes on the same machine,
+  using the sockets in ``FLUENT_PAGES_INVALIDATION_SOCKET_DIR``.
+"""
+import errno
+import os
+import socket
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import request_started
+from fluent_pages import appsettings
+from fluent_pages.invalidation import get_tree_generation
+from fluent_pages.utils.load import import_appsetting_class
+
+__all__ = (
+    'get_invalidation_bus', 'BaseInvalidationBus',
+    'CacheGenerationBus', 'PostgresNotifyBus', 'UnixSocketBus',
+)
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus():
+    """
+    Return the invalidation bus of this process.
+    """
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = import_appsetting_class('FLUENT_PAGES_INVALIDATION_BUS')()
+    return _bus
+
+
+class BaseInvalidationBus(object):
+    """
+    The base class for an invalidation bus.
+    """
+    def __init__(self):
+        self._receivers = []
+
+    def connect(self, receiver):
+        """
+        Register a function that clears a process-local cache.
+        The function is called with the site ID as argument.
+        """
+        if receiver not in self._receivers:
+            self._receivers.append(receiver)
+        return receiver
+
+    def disconnect(self, receiver):
+        """
+        Remove a function which was registered with :func:`connect`.
+        """
+        try:
+            self._receivers.remove(receiver)
+        except ValueError:
+            pass
+
+    @property
+    def has_receivers(self):
+        return bool(self._receivers)
+
+    def publish(self, site_id):
+        """
+        Announce that the page tree of the site changed.
+        The caches of this process are cleared directly.
+        """
+        self.notify(site_id)
+
+    def poll(self, site_id=None):
+        """
+        Check whether other processes changed the page tree.
+        """
+        raise NotImplementedError("{0} should implement poll()".format(self.__class__.__name__))
+
+    def notify(self, site_id):
+        """
+        Call all receivers for the site.
+        """
+        for receiver in list(self._receivers):
+            receiver(site_id)
+
+
+class CacheGenerationBus(BaseInvalidationBus):
+    """
+    Detect changes by reading the tree generation from the cache.
+    This works for all processes that share the same cache backend.
+    """
+    def __init__(self):
+        super(CacheGenerationBus, self).__init__()
+        self.interval = appsettings.FLUENT_PAGES_INVALIDATION_POLL_INTERVAL / 1000.0
+        self._generations = {}
+        self._last_poll = {}
+
+    def publish(self, site_id):
+        # The generation is already increased in the cache, which informs the other processes.
+        # Expect the increment of this process at the next poll(), as the caches are cleared now.
+        # When another process also increased the generation in the meantime, poll() still sees the difference.
+        generation = self._generations.get(site_id)
+        if generation is not None:
+            self._generations[site_id] = generation + 1
+        self.notify(site_id)
+
+    def poll(self, site_id=None):
+        if site_id is None:
+            site_id = settings.SITE_ID
+
+        now = time.time()
+        if now - self._last_poll.get(site_id, 0) < self.interval:
+            return
+        self._last_poll[site_id] = now
+
+        generation = get_tree_generation(site_id)
+        old_generation = self._generations.get(site_id)
+        self._generations[site_id] = generation
+        if old_generation is not None and old_generation != generation:
+            self.notify(site_id)
+
+
+class PostgresNotifyBus(BaseInvalidationBus):
+    """
+    Detect changes using the ``LISTEN``/``NOTIFY`` feature of PostgreSQL.
+    The notification is only delivered when the transaction is committed.
+    Each process opens a separate database connection to receive the notifications.
+    """
+    channel = 'fluent_pages_invalidation'
+
+    def __init__(self):
+        super(PostgresNotifyBus, self).__init__()
+        self._listen_connection = None
+
+    def _get_listen_connection(self):
+        from django.db import connection
+        if self._listen_connection is None:
+            if connection.vendor != 'postgresql':
+                raise ImproperlyConfigured("The PostgresNotifyBus requires a PostgreSQL database.")
+
+            listen_connection = connection.get_new_connection(connection.get_connection_params())
+            listen_connection.autocommit = True
+            listen_connection.cursor().execute('LISTEN {0}'.format(self.channel))
+            self._listen_connection = listen_connection
+        return self._listen_connection
+
+    def publish(self, site_id):
+        from django.db import connection
+        connection.cursor().execute("SELECT pg_notify(%s, %s)", [self.channel, str(site_id)])
+        self.notify(site_id)
+
+    def poll(self, site_id=None):
+        listen_connection = self._get_listen_connection()
+        listen_connection.poll()
+
+        site_ids = set()
+        while listen_connection.notifies:
+            site_ids.add(int(listen_connection.notifies.pop(0).payload))
+
+        # Notifications of this process were already handled in publish()
+        for site_id in site_ids:
+            self.notify(site_id)
+
+
+class UnixSocketBus(BaseInvalidationBus):
+    """
+    Send the changes to the other processes on the same machine using Unix datagram sockets.
+    Each process creates a socket in the ``FLUENT_PAGES_INVALIDATION_SOCKET_DIR`` folder.
+    """
+    def __init__(self):
+        super(UnixSocketBus, self).__init__()
+        self.directory = appsettings.FLUENT_PAGES_INVALIDATION_SOCKET_DIR
+        if not self.directory:
+            raise ImproperlyConfigured("The UnixSocketBus requires the FLUENT_PAGES_INVALIDATION_SOCKET_DIR setting.")
+
+        self._socket = None
+        self._pid = None
+
+    def _get_socket(self):
+        # Sockets can't be shared after a fork(), each process needs it's own socket.
+        if self._socket is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._path = os.path.join(self.directory, 'fluent_pages-{0}-{1}.sock'.format(self._pid, id(self)))
+            if os.path.exists(self._path):
+                os.remove(self._path)
+
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self._path)
+            sock.setblocking(False)
+            self._socket = sock
+        return self._socket
+
+    def publish(self, site_id):
+        sock = self._get_socket()
+        message = str(site_id).encode('ascii')
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if not filename.startswith('fluent_pages-') or path == self._path:
+                continue
+
+            try:
+                sock.sendto(message, path)
+            except socket.error as e:
+                if e.errno in (errno.ECONNREFUSED, errno.ENOENT):
+                    # The process no longer exists, clean up.
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                elif e.errno != errno.EAGAIN:
+                    raise
+        self.notify(site_id)
+
+    def poll(self, site_id=None):
+        sock = self._get_socket()
+        site_ids = set()
+        while True:
+            try:
+                message = sock.recv(64)
+            except socket.error as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            site_ids.add(int(message))
+
+        for site_id in site_ids:
+            self.notify(site_id)
+
+
+def _poll_invalidation_bus(sender, **kwargs):
+    # Only poll when this process has caches to clear.
+    if _bus is not None and _bus.has_receivers:
+        _bus.poll()
+
+request_started.connect(_poll_invalidation_bus, dispatch_uid='fluent_pages.poll_invalidation_bus')
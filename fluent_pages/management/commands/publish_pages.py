@@ -0,0 +1,77 @@
+from optparse import make_option
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils.translation import override
+from fluent_pages import appsettings
+from fluent_pages.models.db import UrlNode, UrlNode_Translation
+from fluent_pages.models.publishing import bulk_publish, bulk_unpublish
+
+
+class Command(BaseCommand):
+    """
+    Publish or unpublish pages, e.g. for a scripted release.
+    """
+    args = "[page_id ...]"
+    help = "Publish the pages with the given IDs or URLs, in chunks of FLUENT_PAGES_BULK_CHUNK_SIZE pages"
+    option_list = BaseCommand.option_list + (
+        make_option('--url', action='append', dest='urls', default=[],
+            help="Select the page by its URL. Can be used multiple times."),
+        make_option('--language', action='store', dest='language', default=None,
+            help="The language of the URLs (default: FLUENT_PAGES_DEFAULT_LANGUAGE_CODE)."),
+        make_option('--site', action='store', dest='site', type='int', default=None,
+            help="The site ID of the URLs (default: SITE_ID)."),
+        make_option('--descendants', action='store_true', dest='descendants', default=False,
+            help="Also include the sub pages of the selected pages."),
+        make_option('--unpublish', action='store_true', dest='unpublish', default=False,
+            help="Change the pages into drafts instead."),
+        make_option('--chunk-size', action='store', dest='chunk_size', type='int', default=None,
+            help="The number of pages to update in a single transaction."),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            page_ids = [long(arg) for arg in args]
+        except ValueError:
+            raise CommandError("Expected page IDs as arguments, use --url to select pages by their URL.")
+
+        site_id = options['site'] or settings.SITE_ID
+        language_code = options['language'] or appsettings.FLUENT_PAGES_DEFAULT_LANGUAGE_CODE
+        for url in options['urls']:
+            # Not using get_for_path(), drafts can be selected too.
+            ids = UrlNode_Translation.objects.filter(
+                master__parent_site=site_id, language_code=language_code, _cached_url=url
+            ).values_list('master_id', flat=True)
+            if not ids:
+                raise CommandError("No page found for the URL '{0}'".format(url))
+            page_ids.append(ids[0])
+
+        if not page_ids:
+            raise CommandError("No pages selected.")
+
+        queryset = UrlNode.objects.filter(pk__in=page_ids)
+        if options['descendants']:
+            # The get_queryset_descendants() method doesn't exist in django-mptt 0.5,
+            # so the tree ranges of the selected pages are filtered directly.
+            ranges = Q(pk__in=page_ids)
+            for tree_id, lft, rght in queryset.non_polymorphic().values_list('tree_id', 'lft', 'rght'):
+                ranges |= Q(tree_id=tree_id, lft__gte=lft, rght__lte=rght)
+            queryset = UrlNode.objects.filter(ranges)
+
+        with override(language_code):
+            if options['unpublish']:
+                result = bulk_unpublish(queryset, chunk_size=options['chunk_size'])
+            else:
+                result = bulk_publish(queryset, chunk_size=options['chunk_size'])
+
+        verbosity = int(options.get('verbosity', 1))
+        if verbosity >= 1:
+            self.stdout.write(u"{0} pages updated\n".format(result.updated))
+            if result.scheduled_ids:
+                self.stdout.write(u"{0} pages become visible at their publication date: {1}\n".format(
+                    len(result.scheduled_ids), u', '.join(str(pk) for pk in result.scheduled_ids)
+                ))
+        if result.invalid_ids:
+            self.stderr.write(u"{0} pages are not published, because their publication end date has passed: {1}\n".format(
+                len(result.invalid_ids), u', '.join(str(pk) for pk in result.invalid_ids)
+            ))
@@ -1,7 +1,7 @@
 from django.core.management.base import NoArgsCommand
 from django.utils.encoding import smart_text
 from fluent_pages import appsettings
-from fluent_pages.models.db import UrlNode_Translation, UrlNode
+from fluent_pages.models.db import UrlNode_Translation, UrlNode, update_page_routes
 
 
 class Command(NoArgsCommand):
@@ -30,6 +30,10 @@ class Command(NoArgsCommand):
             else:
                 self.stdout.write(smart_text(u"- {0}\t {1} {2}\n".format(translation.master_id, translation.language_code, translation._cached_url)))
 
+        if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES:
+            update_page_routes()
+            self.stdout.write(u"Updated the page routes\n")
+
 
     def _construct_url(self, language_code, child_id, parents, slugs, overrides):
         fallback = appsettings.FLUENT_PAGES_LANGUAGES.get_fallback_language(language_code)
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import NoArgsCommand
+from fluent_pages.models.db import PageLayout
+from fluent_pages.utils.templatefiles import get_template_choices
+
+
+class Command(NoArgsCommand):
+    """
+    Scan the template directory again.
+    """
+    help = "Refresh the cached list of layout templates in the FLUENT_PAGES_TEMPLATE_DIR"
+
+    def handle_noargs(self, **options):
+        field = PageLayout._meta.get_field('template_path')
+
+        start = time.time()
+        # The allow_files/allow_folders options are Django 1.5+
+        choices = get_template_choices(field.path, field.match, field.recursive,
+                                       getattr(field, 'allow_files', True), getattr(field, 'allow_folders', False), refresh=True)
+
+        if int(options.get('verbosity', 1)) >= 1:
+            self.stdout.write(u"- {0}: {1} templates in {2:.1f} ms\n".format(
+                field.path, len(choices), (time.time() - start) * 1000
+            ))
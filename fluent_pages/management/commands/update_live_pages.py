@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+from optparse import make_option
+from django.core.management.base import NoArgsCommand
+from fluent_pages.models.publishing import update_live_pages, get_next_live_change
+from fluent_pages.utils.compat import now
+
+
+class Command(NoArgsCommand):
+    """
+    Update the ``is_live`` field of pages which passed their publication date or publication end date.
+    """
+    help = "Make pages visible or hidden when their publication date or end date has passed. Required for FLUENT_PAGES_USE_IS_LIVE"
+    option_list = NoArgsCommand.option_list + (
+        make_option('--watch', action='store_true', dest='watch', default=False,
+            help="Keep running, and update the pages at the moment their publication date passes."),
+        make_option('--interval', action='store', dest='interval', type='int', default=60,
+            help="The maximum number of seconds to wait between updates in --watch mode (default: 60)."),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        while True:
+            result = update_live_pages()
+            if verbosity >= 1 and (result.live_ids or result.offline_ids or not options['watch']):
+                self.stdout.write(u"{0}: {1} pages became visible, {2} pages are hidden\n".format(
+                    now().strftime('%Y-%m-%d %H:%M:%S'), len(result.live_ids), len(result.offline_ids)
+                ))
+
+            if not options['watch']:
+                break
+
+            # Wake up right after the next publication date passes.
+            # The interval also picks up pages which are scheduled while waiting.
+            delay = options['interval']
+            next_change = get_next_live_change()
+            if next_change is not None:
+                delta = next_change + timedelta(seconds=1) - now()
+                delay = max(0, min(delay, delta.days * 86400 + delta.seconds))  # total_seconds() is Python 2.7+
+            time.sleep(delay)
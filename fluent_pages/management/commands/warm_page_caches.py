@@ -0,0 +1,64 @@
+import time
+from optparse import make_option
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import NoArgsCommand
+from django.utils import translation
+from fluent_pages import appsettings
+from fluent_pages.extensions import page_type_pool
+from fluent_pages.models.caches import get_route_table, get_navigation_pages, get_page_choices
+from fluent_pages.models.db import UrlNode
+from fluent_pages.urlresolvers import _get_pages_of_type, _get_pages_of_type_cache_key
+
+
+class Command(NoArgsCommand):
+    """
+    Fill the caches of the page tree.
+    """
+    help = "Fill the route table, navigation, page choices and app_reverse caches for all sites and languages"
+    option_list = NoArgsCommand.option_list + (
+        make_option('--site', action='store', dest='site', type='int', default=None,
+            help="Only fill the caches of the given site ID."),
+    )
+
+    def handle_noargs(self, **options):
+        if options['site']:
+            site_ids = [options['site']]
+        elif appsettings.FLUENT_PAGES_FILTER_SITE_ID:
+            site_ids = [settings.SITE_ID]
+        else:
+            site_ids = sorted(UrlNode.objects.order_by().values_list('parent_site', flat=True).distinct())
+
+        verbosity = int(options.get('verbosity', 1))
+        for site_id in site_ids:
+            for language_code in appsettings.get_language_codes(site_id):
+                with translation.override(language_code):
+                    for name, func in (('routes', self._warm_routes), ('navigation', self._warm_navigation), ('page choices', self._warm_page_choices)):
+                        start = time.time()
+                        count = func(language_code, site_id)
+                        if verbosity >= 1:
+                            self.stdout.write(u"- site {0}, {1}\t {2}: {3} entries in {4:.1f} ms\n".format(
+                                site_id, language_code, name, count, (time.time() - start) * 1000
+                            ))
+
+        # The app_reverse() cache is shared between all languages, and only available for the current site.
+        start = time.time()
+        count = 0
+        for plugin in page_type_pool.get_url_pattern_plugins():
+            cache.delete(_get_pages_of_type_cache_key(plugin.model))
+            count += len(_get_pages_of_type(plugin.model))
+
+        if verbosity >= 1:
+            self.stdout.write(u"- site {0}\t app_reverse: {1} entries in {2:.1f} ms\n".format(
+                settings.SITE_ID, count, (time.time() - start) * 1000
+            ))
+
+
+    def _warm_routes(self, language_code, site_id):
+        return len(get_route_table(language_code, site_id, refresh=True))
+
+    def _warm_navigation(self, language_code, site_id):
+        return len(get_navigation_pages(language_code, site_id, refresh=True))
+
+    def _warm_page_choices(self, language_code, site_id):
+        return len(get_page_choices(language_code, site_id, refresh=True))
@@ -0,0 +1,41 @@
+from optparse import make_option
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import NoArgsCommand, CommandError
+from fluent_pages import appsettings
+from fluent_pages.models.db import UrlNode
+from fluent_pages.sitemaps import write_sitemap_files
+
+
+class Command(NoArgsCommand):
+    """
+    Write the static sitemap files.
+    """
+    help = "Write the gzipped sitemap files to the FLUENT_PAGES_SITEMAP_DIR"
+    option_list = NoArgsCommand.option_list + (
+        make_option('--site', action='store', dest='site', type='int', default=None,
+            help="Only write the sitemap files of the given site ID."),
+        make_option('--protocol', action='store', dest='protocol', default='http',
+            help="The protocol to use in the sitemap URLs (default: http)."),
+    )
+
+    def handle_noargs(self, **options):
+        if not appsettings.FLUENT_PAGES_SITEMAP_DIR:
+            raise CommandError("The setting 'FLUENT_PAGES_SITEMAP_DIR' is not defined.")
+
+        if options['site']:
+            site_ids = [options['site']]
+        elif appsettings.FLUENT_PAGES_FILTER_SITE_ID:
+            site_ids = [settings.SITE_ID]
+        else:
+            site_ids = UrlNode.objects.order_by().values_list('parent_site', flat=True).distinct()
+
+        for site in Site.objects.filter(pk__in=list(site_ids)):
+            try:
+                filenames = write_sitemap_files(site, protocol=options['protocol'])
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+
+            for filename in filenames:
+                self.stdout.write(u"- {0}\t {1}\n".format(site.domain, filename))
@@ -5,6 +5,8 @@ The objects can be imported from the main package.
 There are several sub packages:
 
     db: The database models
+    caches: Cached lookup tables of the page tree
+    publishing: Publishing or unpublishing many pages at once
     managers: Additional manager classes
     modeldata: Classes that expose model data in a sane way (for template designers)
     navigation: The menu navigation nodes (for template designers)
@@ -13,11 +15,12 @@ There are several sub packages:
 # Like django.db.models, or django.forms,
 # have everything split into several packages
 from django.conf import settings
+from fluent_pages import appsettings
 from fluent_pages.forms.fields import PageChoiceField
 import fluent_pages.models.db
-from .db import UrlNode, UrlNode_Translation, Page, HtmlPage, PageLayout
+from .db import UrlNode, UrlNode_Translation, Page, HtmlPage, PageLayout, PageRoute
 
-__all__ = ['UrlNode', 'UrlNode_Translation', 'Page', 'HtmlPage', 'PageLayout']
+__all__ = ['UrlNode', 'UrlNode_Translation', 'Page', 'HtmlPage', 'PageLayout', 'PageRoute']
 
 
 def _register_cmsfield_url_type():
@@ -31,5 +34,35 @@ def _register_cmsfield_url_type():
         AnyUrlField.register_model(Page, form_field=PageChoiceField(widget=SimpleRawIdWidget(Page)))
 
 
+def _register_sitemap_writer():
+    from fluent_pages.signals import post_page_save, post_page_delete
+    from fluent_pages.sitemaps import _write_site_sitemap_files
+    post_page_save.connect(_write_site_sitemap_files, dispatch_uid='fluent_pages.write_sitemap_files')
+    post_page_delete.connect(_write_site_sitemap_files, dispatch_uid='fluent_pages.write_sitemap_files')
+
+
+def _register_cache_warmup():
+    from django.core.management import call_command
+
+    def _warm_page_caches(sender, **kwargs):
+        # South sends the app label, syncdb sends the models module of each app.
+        if kwargs.get('app') == 'fluent_pages' or getattr(sender, '__name__', None) == __name__:
+            call_command('warm_page_caches', verbosity=kwargs.get('verbosity', 1))
+
+    try:
+        from south.signals import post_migrate
+    except ImportError:
+        from django.db.models.signals import post_syncdb
+        post_syncdb.connect(_warm_page_caches, dispatch_uid='fluent_pages.warm_page_caches')
+    else:
+        post_migrate.connect(_warm_page_caches, dispatch_uid='fluent_pages.warm_page_caches')
+
+
 if 'any_urlfield' in settings.INSTALLED_APPS:
     _register_cmsfield_url_type()
+
+if appsettings.FLUENT_PAGES_SITEMAP_WRITE_ON_SAVE:
+    _register_sitemap_writer()
+
+if appsettings.FLUENT_PAGES_WARM_CACHES_ON_MIGRATE:
+    _register_cache_warmup()
@@ -0,0 +1,177 @@
+"""
+Cached lookup tables of the page tree.
+
+The cache keys include the tree generation (see :func:`~fluent_pages.invalidation.get_tree_cache_key`),
+so the tables are renewed automatically when a page of the site is saved, moved or deleted.
+Only the publication status is taken into account when building the tables,
+the publication dates are checked each time the table is read.
+
+The URL dispatcher and ``render_menu`` tag only use these tables when ``FLUENT_PAGES_CACHE_PAGE_TREE`` is enabled.
+Only enable this with a cache backend that is shared between all processes (e.g. memcached or redis),
+as the tree generation is stored in the cache. With a process-local cache, other processes would keep
+serving the old tables until the cache timeout. Note that the route table of a large site is a single cache value,
+which can exceed the maximum item size of memcached.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.datastructures import SortedDict
+from django.utils.translation import get_language
+from parler import is_multilingual_project
+from fluent_pages import appsettings
+from fluent_pages.invalidation import get_tree_cache_key
+from fluent_pages.utils.compat import now
+
+__all__ = (
+    'get_route_table', 'build_route_table',
+    'get_navigation_pages', 'build_navigation_pages',
+    'get_page_choices', 'build_page_choices',
+)
+
+# The keys change when the tree changes, no need to expire them soon.
+CACHE_TIMEOUT = 86400
+
+
+def get_route_table(language_code=None, site_id=None, refresh=False):
+    """
+    Return all published URLs of a site, as dictionary of ``{url: content type ID}``.
+    This allows to detect that a path doesn't exist, without querying the database.
+    Use ``refresh=True`` to rebuild the cached table.
+    """
+    if language_code is None:
+        language_code = get_language()
+    if site_id is None:
+        site_id = settings.SITE_ID
+
+    cachekey = get_tree_cache_key('routes', site_id, language_code)
+    routes = None if refresh else cache.get(cachekey)
+    if routes is None:
+        routes = build_route_table(language_code, site_id)
+        cache.set(cachekey, routes, CACHE_TIMEOUT)
+    return routes
+
+
+def build_route_table(language_code, site_id):
+    """
+    Read the route table from the database.
+    """
+    from fluent_pages.models import UrlNode, UrlNode_Translation
+    rows = UrlNode_Translation.objects.filter(
+        master__parent_site=site_id,
+        master__status=UrlNode.PUBLISHED,
+        language_code=language_code
+    ).values_list('_cached_url', 'master__polymorphic_ctype')
+    return dict(rows)
+
+
+def get_navigation_pages(language_code=None, site_id=None, current_page=None, refresh=False):
+    """
+    Return the toplevel pages of the menu, like :func:`UrlNodeManager.toplevel_navigation()
+    <fluent_pages.models.managers.UrlNodeManager.toplevel_navigation>` does.
+    Use ``refresh=True`` to rebuild the cached list.
+    """
+    if language_code is None:
+        language_code = get_language()
+    if site_id is None:
+        site_id = settings.SITE_ID
+
+    cachekey = get_tree_cache_key('navigation', site_id, language_code)
+    pages = None if refresh else cache.get(cachekey)
+    if pages is None:
+        pages = build_navigation_pages(language_code, site_id)
+        cache.set(cachekey, pages, CACHE_TIMEOUT)
+
+    current_id = current_page.pk if current_page else None
+    date = now()
+    result = []
+    for page in pages:
+        if _is_live(page.publication_date, page.publication_end_date, date):
+            if current_id is not None:
+                page.is_current = (page.pk == current_id)
+            result.append(page)
+    return result
+
+
+def build_navigation_pages(language_code, site_id):
+    """
+    Read the toplevel pages of the menu from the database.
+    The translations of the pages are loaded, so they are stored in the cache as well.
+    """
+    from fluent_pages.models import UrlNode
+    qs = UrlNode.objects.parent_site(site_id).filter(status=UrlNode.PUBLISHED) \
+        .toplevel().filter(in_navigation=True).non_polymorphic().prefetch_translations(language_code)
+    if appsettings.FLUENT_PAGES_USE_IS_LIVE:
+        qs = qs.filter(is_live=True)
+
+    # Make sure only translated menu items are visible.
+    if is_multilingual_project():
+        qs = qs.active_translations(language_code)
+
+    pages = list(qs)
+    for page in pages:
+        page.set_current_language(language_code)
+        page.url  # reads the translation, and fallback
+    return pages
+
+
+def get_page_choices(language_code=None, site_id=None, refresh=False):
+    """
+    Return the published pages of a site as ``(id, level, title)`` tuples, in the order of the tree.
+    This is used by the :class:`~fluent_pages.forms.fields.PageChoiceField`.
+    Use ``refresh=True`` to rebuild the cached list.
+    """
+    if language_code is None:
+        language_code = get_language()
+    if site_id is None:
+        site_id = settings.SITE_ID
+
+    cachekey = get_tree_cache_key('page_choices', site_id, language_code)
+    rows = None if refresh else cache.get(cachekey)
+    if rows is None:
+        rows = build_page_choices(language_code, site_id)
+        cache.set(cachekey, rows, CACHE_TIMEOUT)
+
+    date = now()
+    return [
+        (pk, level, title) for pk, level, title, publication_date, publication_end_date in rows
+        if _is_live(publication_date, publication_end_date, date)
+    ]
+
+
+def build_page_choices(language_code, site_id):
+    """
+    Read the choices from the database, in a single query.
+    The title is read from the given language, the fallback language, or any other available language.
+    """
+    from fluent_pages.models import UrlNode, UrlNode_Translation
+    qs = UrlNode_Translation.objects.filter(master__status=UrlNode.PUBLISHED)
+    if appsettings.FLUENT_PAGES_USE_IS_LIVE:
+        qs = qs.filter(master__is_live=True)
+    if appsettings.FLUENT_PAGES_FILTER_SITE_ID:
+        qs = qs.filter(master__parent_site=site_id)
+
+    rows = qs.order_by('master__tree_id', 'master__lft').values_list(
+        'master_id', 'master__level', 'master__publication_date', 'master__publication_end_date',
+        'language_code', 'title', 'slug'
+    )
+
+    fallback = appsettings.FLUENT_PAGES_LANGUAGES.get_fallback_language(language_code)
+    priority = {language_code: 2, fallback: 1}
+    pages = SortedDict()
+    for pk, level, publication_date, publication_end_date, code, title, slug in rows:
+        prio = priority.get(code, 0)
+        page = pages.get(pk)
+        if page is None or prio > page[0]:
+            pages[pk] = (prio, (pk, level, title or slug, publication_date, publication_end_date))
+
+    return [row for row_prio, row in pages.itervalues()]
+
+
+def _is_live(publication_date, publication_end_date, date):
+    """
+    Same filters as :func:`UrlNodeQuerySet.published() <fluent_pages.models.managers.UrlNodeQuerySet.published>`.
+    With ``FLUENT_PAGES_USE_IS_LIVE``, the cached rows are already filtered, and renewed when the pages go live.
+    """
+    if appsettings.FLUENT_PAGES_USE_IS_LIVE:
+        return True
+    return (publication_date is None or publication_date < date) \
+       and (publication_end_date is None or publication_end_date >= date)
@@ -6,12 +6,16 @@ It defines the following classes:
 * UrlNode
   A item node. Can be an HTML page, image, symlink, etc..
 
+* PageRoute
+  A denormalized index of the URLs, to resolve paths quickly.
+
 * PageLayout
   The layout of a page, which has regions and a template.
 """
-from django.core.cache import cache
+import django
 from django.core.exceptions import ImproperlyConfigured
 from django.core.urlresolvers import reverse, NoReverseMatch
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
@@ -19,15 +23,18 @@ from parler.models import TranslatableModel, TranslatedFieldsModel
 from parler.fields import TranslatedField
 from parler.utils import get_language_title, is_multilingual_project
 from polymorphic_tree.models import PolymorphicMPTTModel, PolymorphicMPTTModelBase
-from fluent_pages.models.fields import TemplateFilePathField, PageTreeForeignKey
+from fluent_pages.models.fields import TemplateFilePathField, PageTreeForeignKey, SiteForeignKey
 from fluent_pages.models.managers import UrlNodeManager
 from fluent_pages import appsettings
-from fluent_pages.utils.compat import get_user_model_name, transaction_atomic
+from fluent_pages.invalidation import invalidation_batch, expire_page_caches, bump_tree_generation, _run_on_commit
+from fluent_pages.signals import post_page_save, post_page_delete
+from fluent_pages.utils.compat import get_user_model_name, now, transaction_atomic
+from fluent_pages.utils.sites import get_current_site
 from parler.utils.context import switch_language
 
 
 def _get_current_site():
-    return Site.objects.get_current()
+    return get_current_site()
 
 
 class URLNodeMetaClass(PolymorphicMPTTModelBase):
@@ -68,7 +75,7 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
     title = TranslatedField(any_language=True)
     slug = TranslatedField()  # Explicitly added, but not needed
     parent = PageTreeForeignKey('self', blank=True, null=True, related_name='children', verbose_name=_('parent'), help_text=_('You can also change the parent by dragging the page in the list.'))
-    parent_site = models.ForeignKey(Site, editable=False, default=_get_current_site)
+    parent_site = SiteForeignKey(Site, editable=False, default=_get_current_site)
     #children = a RelatedManager by 'parent'
 
     # Publication information
@@ -76,6 +83,7 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
     publication_date = models.DateTimeField(_('publication date'), null=True, blank=True, db_index=True, help_text=_('''When the page should go live, status must be "Published".'''))
     publication_end_date = models.DateTimeField(_('publication end date'), null=True, blank=True, db_index=True)
     in_navigation = models.BooleanField(_('show in navigation'), default=appsettings.FLUENT_PAGES_DEFAULT_IN_NAVIGATION, db_index=True)
+    is_live = models.BooleanField(_('is live'), default=False, editable=False, db_index=True)  # updated by the update_live_pages command.
     override_url = TranslatedField()
 
     # Metadata
@@ -95,6 +103,11 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         ordering = ('lft',)
         verbose_name = _('URL Node')
         verbose_name_plural = _('URL Nodes')  # Using Urlnode here makes it's way to the admin pages too.
+        if django.VERSION >= (1, 5):
+            # The indexes are created by the South migration, this only informs Django about them.
+            index_together = (
+                ('parent_site', 'status', 'in_navigation', 'parent', 'lft'),  # published().in_navigation() and the menu
+            )
         permissions = (
             ('change_shared_fields_urlnode', _("Can change Shared fields")),  # The fields shared between languages.
         )
@@ -115,13 +128,15 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         super(UrlNode, self).__init__(*args, **kwargs)
 
         # Cache a copy of the loaded _cached_url value so we can reliably
-        # determine whether it has been changed in the save handler:
-        self._original_pub_date = self.publication_date if not self._deferred else None
-        self._original_pub_end_date = self.publication_end_date if not self._deferred else None
-        self._original_status = self.status if not self._deferred else None
-        self._original_parent = self.parent_id if not self._deferred else None
+        # determine whether it has been changed in the save handler.
+        # The values are read from __dict__, as any deferred field would trigger a query.
+        self._original_pub_date = self.__dict__.get('publication_date')
+        self._original_pub_end_date = self.__dict__.get('publication_end_date')
+        self._original_status = self.__dict__.get('status')
+        self._original_parent = self.__dict__.get('parent_id')
 
         self._cached_ancestors = None
+        self._descendant_urls_changed = False
         self.is_current = None    # Can be defined by mark_current()
         self.is_onpath = None     # is an ancestor of the current node (part of the "menu trail").
 
@@ -203,7 +218,7 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         """
         # Cache ancestors, we need them more often
         if not self._cached_ancestors:
-            self._cached_ancestors = list(self.get_ancestors())
+            self._cached_ancestors = list(self.get_ancestors()._prefetch_default_translations())
 
         nodes = self._cached_ancestors[:]
         nodes.append(self)
@@ -218,6 +233,19 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         return self.status == self.PUBLISHED
 
 
+    def get_is_live(self, date=None):
+        """
+        .. versionadded:: 0.9
+           Return whether the page is visible at the given date, based on the status and publication dates.
+           This is the value stored in the :attr:`is_live` field.
+        """
+        if date is None:
+            date = now()
+        return self.status == self.PUBLISHED \
+           and (self.publication_date is None or self.publication_date < date) \
+           and (self.publication_end_date is None or self.publication_end_date >= date)
+
+
     @property
     def is_draft(self):
         """
@@ -272,12 +300,16 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
             # Corresponding page_type_pool method is still private on purpose.
             # Not sure the utility method should be public, or how it should be named.
             return page_type_pool._get_plugin_by_content_type(self.polymorphic_ctype_id)
+        elif self._deferred:
+            # The model is a generated subclass when fields are deferred.
+            return page_type_pool.get_plugin_by_model(self._meta.proxy_for_model)
         else:
             return page_type_pool.get_plugin_by_model(self.__class__)
 
 
     # ---- Custom behavior ----
 
+    @invalidation_batch()
     @transaction_atomic
     def move_to(self, target, position='first-child'):
         # This is called by django-polymorphic-tree when moving a page.
@@ -286,6 +318,8 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
 
 
     # This code runs in a transaction since it's potentially editing a lot of records (all descendant urls).
+    # The caches of all changed nodes are cleared at once afterwards.
+    @invalidation_batch()
     @transaction_atomic
     def save(self, *args, **kwargs):
         """
@@ -295,14 +329,29 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         if parent_changed:
             self._mark_all_translations_dirty()
 
+        self.is_live = self.get_is_live()
         super(UrlNode, self).save(*args, **kwargs)  # Already saves translated model.
 
+        # Any change (e.g. title, in_navigation) can affect the menus, renew all tree cache keys.
+        bump_tree_generation(self.parent_site_id)
+
+        if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES:
+            # The status and publication dates are also stored in the route.
+            node_ids = [self.pk]
+            if self._descendant_urls_changed:
+                node_ids += list(self.get_descendants().values_list('pk', flat=True))
+            update_page_routes(node_ids)
+        self._descendant_urls_changed = False
+
         # Update state for next save (if object is persistent somewhere)
         self._original_parent = self.parent_id
         self._original_pub_date = self.publication_date
         self._original_pub_end_date = self.publication_end_date
         self._original_status = self.status
 
+        # Receivers (e.g. the sitemap writer) run after the commit, so their failures can't undo the save.
+        _run_on_commit(lambda: post_page_save.send(sender=self.__class__, instance=self))
+
 
     def _mark_all_translations_dirty(self):
         # Update the cached_url of all translations.
@@ -333,7 +382,11 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         self._make_slug_unique(translation)
         self._update_cached_url(translation)
         url_changed = translation.is_cached_url_modified
-        super(UrlNode, self).save_translation(translation, *args, **kwargs)
+        translation._update_page_routes = False  # save() updates the routes of all translations at once.
+        try:
+            super(UrlNode, self).save_translation(translation, *args, **kwargs)
+        finally:
+            translation._update_page_routes = True
 
         # Detect changes
         published_changed = self._original_pub_date != self.publication_date \
@@ -348,9 +401,11 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
                 self._update_decendant_urls(translation)
 
 
+    @invalidation_batch()
     def delete(self, *args, **kwargs):
         super(UrlNode, self).delete(*args, **kwargs)
         self._expire_url_caches()
+        _run_on_commit(lambda: post_page_delete.send(sender=self.__class__, instance=self))
 
 
     # Following of the principles for "clean code"
@@ -362,6 +417,11 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         Check for duplicate slugs at the same level, and make the current object unique.
         """
         origslug = translation.slug
+        if translation._validated_slug == (self.parent_id, origslug):
+            # Already checked by the admin form.
+            translation._validated_slug = None
+            return
+
         dupnr = 1
         while True:
             others = UrlNode.objects.filter(
@@ -419,6 +479,8 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
         # This block of code is largely inspired and based on FeinCMS
         # (c) Matthias Kestenholz, BSD licensed
 
+        self._descendant_urls_changed = True
+
         # Keep cache
         current_language = translation.language_code
         fallback_language = appsettings.FLUENT_PAGES_LANGUAGES.get_fallback_language(current_language)
@@ -474,12 +536,9 @@ class UrlNode(PolymorphicMPTTModel, TranslatableModel):
     def _expire_url_caches(self):
         """
         Reset all cache keys related to this model.
+        Within :func:`save` and :func:`delete`, the keys are collected and cleared once.
         """
-        cachekeys = [
-            'fluent_pages.instance_of.{0}'.format(self.__class__.__name__),  # urlresolvers._get_pages_of_type()
-        ]
-        for cachekey in cachekeys:
-            cache.delete(cachekey)
+        expire_page_caches(self)
 
 
 
@@ -503,6 +562,11 @@ class UrlNode_Translation(TranslatedFieldsModel):
             #('master__parent_site', '_cached_url', 'language_code'),
             ('language_code', 'master'),
         )
+        if django.VERSION >= (1, 5):
+            index_together = (
+                ('language_code', '_cached_url'),  # get_for_path()
+                ('master', 'language_code'),       # reading the translations of a page
+            )
         verbose_name = _('URL Node translation')
         verbose_name_plural = _('URL Nodes translations')  # Using Urlnode here makes it's way to the admin pages too.
 
@@ -518,6 +582,8 @@ class UrlNode_Translation(TranslatedFieldsModel):
         super(UrlNode_Translation, self).__init__(*args, **kwargs)
         self._original_cached_url = self._cached_url
         self._fetched_parent_url = None  # Allow passing data in UrlNode.save()
+        self._validated_slug = None      # (parent_id, slug) checked by UrlNodeAdminForm.clean()
+        self._update_page_routes = True  # disabled while UrlNode.save() saves the translation.
 
     @property
     def is_cached_url_modified(self):
@@ -527,6 +593,18 @@ class UrlNode_Translation(TranslatedFieldsModel):
         super(UrlNode_Translation, self).save(*args, **kwargs)
         self._original_cached_url = self._cached_url
 
+        # When the translation is saved directly, keep the routes in sync.
+        if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES and self._update_page_routes and self.master_id:
+            update_page_routes([self.master_id])
+
+    def delete(self, *args, **kwargs):
+        master_id = self.master_id
+        super(UrlNode_Translation, self).delete(*args, **kwargs)
+
+        # e.g. the "delete translation" view of the admin, don't keep serving the page at the old URL.
+        if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES and master_id:
+            update_page_routes([master_id])
+
     def get_ancestors(self, ascending=False, include_self=False):
         # For the delete page, mptt_breadcrumb filter in the django-polymorphic-tree templates.
         return self.master.get_ancestors(ascending=ascending, include_self=include_self)
@@ -558,6 +636,72 @@ class UrlNode_Translation(TranslatedFieldsModel):
 
 
 
+class PageRoute(models.Model):
+    """
+    A denormalized copy of the translated URLs, with the fields needed to resolve a path.
+    This allows :func:`~fluent_pages.models.managers.UrlNodeQuerySet.get_for_path` to find a page
+    with a single index lookup, instead of joining the node and translation tables.
+
+    The table is only filled when ``FLUENT_PAGES_USE_PAGE_ROUTES = True`` is set.
+    Use the ``rebuild_page_tree`` management command to fill it for existing pages.
+    """
+    site = models.ForeignKey(Site, related_name='+')
+    language_code = models.CharField(max_length=15)
+    cached_url = models.CharField(max_length=300)
+    node = models.ForeignKey(UrlNode, related_name='routes')
+    polymorphic_ctype = models.ForeignKey(ContentType, related_name='+')
+    status = models.CharField(max_length=1)
+    publication_date = models.DateTimeField(null=True)
+    publication_end_date = models.DateTimeField(null=True)
+
+    class Meta:
+        app_label = 'fluent_pages'
+        unique_together = (
+            ('site', 'language_code', 'cached_url'),
+        )
+        verbose_name = _('Page route')
+        verbose_name_plural = _('Page routes')
+
+    def __repr__(self):
+        return "<{0}: {1}, {2}, node: #{3}>".format(self.__class__.__name__, self.cached_url, self.language_code, self.node_id)
+
+
+def update_page_routes(node_ids=None):
+    """
+    Update the :class:`PageRoute` table for the given nodes, or all nodes when ``node_ids`` is ``None``.
+    """
+    translations = UrlNode_Translation.objects.all()
+    routes = PageRoute.objects.all()
+    if node_ids is not None:
+        translations = translations.filter(master__in=node_ids)
+        routes = routes.filter(node__in=node_ids)
+
+    rows = translations.values_list(
+        'master_id', 'language_code', '_cached_url', 'master__parent_site', 'master__polymorphic_ctype',
+        'master__status', 'master__publication_date', 'master__publication_end_date'
+    )
+
+    # A duplicate URL (e.g. a repeated override URL) is only stored once.
+    new_routes = {}
+    for node_id, language_code, cached_url, site_id, ctype_id, status, publication_date, publication_end_date in rows:
+        new_routes[(site_id, language_code, cached_url)] = PageRoute(
+            node_id=node_id, language_code=language_code, cached_url=cached_url, site_id=site_id, polymorphic_ctype_id=ctype_id,
+            status=status, publication_date=publication_date, publication_end_date=publication_end_date
+        )
+
+    routes.delete()
+    if node_ids is not None:
+        # The URL of another node is taken over by the node which is saved last.
+        urls = {}
+        for site_id, language_code, cached_url in new_routes.iterkeys():
+            urls.setdefault((site_id, language_code), []).append(cached_url)
+        for (site_id, language_code), cached_urls in urls.iteritems():
+            PageRoute.objects.filter(site=site_id, language_code=language_code, cached_url__in=cached_urls).delete()
+
+    PageRoute.objects.bulk_create(new_routes.values())
+
+
+
 class TranslationDoesNotExist(UrlNode_Translation.DoesNotExist):
     """
     The operation can't be completed, because a translation is missing.
@@ -3,6 +3,7 @@ from django.db.models.fields.related import ReverseSingleRelatedObjectDescriptor
 from django.utils.translation import ugettext_lazy as _
 from polymorphic_tree.models import PolymorphicTreeForeignKey
 from fluent_pages import forms
+from fluent_pages.utils.sites import get_site
 
 
 class TemplateFilePathField(models.FilePathField):
@@ -44,6 +45,26 @@ class PageTreeForeignKey(PolymorphicTreeForeignKey):
         setattr(cls, self.name, TranslatedForeignKeyDescriptor(self))  # override what ForeignKey does.
 
 
+class CachedSiteDescriptor(ReverseSingleRelatedObjectDescriptor):
+    def __get__(self, instance, instance_type=None):
+        # Read the site from the process-level cache, instead of performing a query for every object.
+        if instance is not None and not hasattr(instance, self.cache_name):
+            site_id = getattr(instance, self.field.attname)
+            if site_id is not None:
+                setattr(instance, self.cache_name, get_site(site_id))
+        return super(CachedSiteDescriptor, self).__get__(instance, instance_type)
+
+
+class SiteForeignKey(models.ForeignKey):
+    """
+    A foreign key to the :class:`~django.contrib.sites.models.Site` model,
+    which reads the object from the site cache.
+    """
+    def contribute_to_class(self, cls, name):
+        super(SiteForeignKey, self).contribute_to_class(cls, name)
+        setattr(cls, self.name, CachedSiteDescriptor(self))  # override what ForeignKey does.
+
+
 try:
     from south.modelsinspector import add_introspection_rules
 except ImportError:
@@ -53,4 +74,5 @@ else:
     add_introspection_rules([], [
         _name_re + "\.TemplateFilePathField",
         _name_re + "\.PageTreeForeignKey",
+        _name_re + "\.SiteForeignKey",
     ])
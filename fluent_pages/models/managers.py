@@ -1,16 +1,25 @@
 """
 The manager class for the CMS models
 """
+import django
+from collections import defaultdict
+from itertools import islice
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.urlresolvers import reverse, NoReverseMatch
 from django.db.models.query_utils import Q
+from django.utils import translation
 from django.utils.translation import get_language
 from parler import is_multilingual_project
 from parler.managers import TranslatableQuerySet, TranslatableManager
 from polymorphic_tree.managers import PolymorphicMPTTModelManager, PolymorphicMPTTQuerySet
 from fluent_pages import appsettings
+from fluent_pages.invalidation import invalidation_batch, expire_queryset_caches
 from fluent_pages.utils.db import DecoratingQuerySet
 from fluent_pages.utils.compat import now
 
+_ITER_CHUNK_SIZE = 100  # the chunk size of QuerySet.iterator() in Django 1.4/1.5
+
 
 class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQuerySet):
     """
@@ -19,11 +28,19 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
     def __init__(self, *args, **kwargs):
         super(UrlNodeQuerySet, self).__init__(*args, **kwargs)
         self._parent_site = None
+        self._defer_heavy_fields = False
+        self._prefetch_translations = False
+        self._prefetch_language = None
+        self._published = False
 
 
     def _clone(self, klass=None, setup=False, **kw):
         c = super(UrlNodeQuerySet, self)._clone(klass, setup, **kw)
         c._parent_site = self._parent_site
+        c._defer_heavy_fields = self._defer_heavy_fields
+        c._prefetch_translations = self._prefetch_translations
+        c._prefetch_language = self._prefetch_language
+        c._published = self._published
         return c
 
 
@@ -41,13 +58,22 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
         Raises UrlNode.DoesNotExist when the item is not found.
 
         .. versionchanged:: 0.9 This filter only returns the pages of the current site.
+        .. versionchanged:: 0.9 The :class:`~fluent_pages.models.PageRoute` table is used when ``FLUENT_PAGES_USE_PAGE_ROUTES`` is enabled.
         """
         if language_code is None:
             language_code = get_language()
 
         # Don't normalize slashes, expect the URLs to be sane.
+        qs = self._single_site()._prefetch_for_language(language_code)
         try:
-            object = self._single_site().get(translations___cached_url=path, translations__language_code=language_code)
+            if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES:
+                node_ids = qs._get_route_node_ids([path], language_code)
+                if not node_ids:
+                    raise self.model.DoesNotExist()
+                object = qs.get(pk=node_ids[0])
+            else:
+                object = qs.get(translations___cached_url=path, translations__language_code=language_code)
+
             object.set_current_language(language_code)  # NOTE. Explicitly set language to the state the object was fetched in.
             return object
         except self.model.DoesNotExist:
@@ -68,8 +94,19 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
         # Based on FeinCMS:
         paths = self._split_path_levels(path)
 
+        if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES:
+            qs = self._single_site()._prefetch_for_language(language_code)
+            node_ids = qs._get_route_node_ids(paths, language_code)
+            objects = dict((obj.pk, obj) for obj in qs.filter(pk__in=node_ids)) if node_ids else {}
+            for node_id in node_ids:
+                if node_id in objects:
+                    object = objects[node_id]
+                    object.set_current_language(language_code)
+                    return object
+            raise self.model.DoesNotExist(u"No published {0} found for the path '{1}'".format(self.model.__name__, path))
+
         try:
-            qs = self._single_site() \
+            qs = self._single_site()._prefetch_for_language(language_code) \
                      .filter(translations___cached_url__in=paths, translations__language_code=language_code) \
                      .extra(select={'_url_length': 'LENGTH(_cached_url)'}) \
                      .order_by('-level', '-_url_length')  # / and /news/ is both level 0
@@ -80,6 +117,76 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
             raise self.model.DoesNotExist(u"No published {0} found for the path '{1}'".format(self.model.__name__, path))
 
 
+    def get_urls(self, pages=None, language_code=None):
+        """
+        .. versionadded:: 0.9
+           Return the URLs of many pages at once, as dictionary of ``{id: url}``.
+
+        The URLs are read with a single query, which also handles the fallback language.
+        The ``pages`` can be a list of objects or ID's. When omitted, the URLs of all pages in this queryset are returned.
+        Pages without a translation are not included in the result.
+
+        Like :attr:`UrlNode.default_url <fluent_pages.models.UrlNode.default_url>`,
+        the ``ABSOLUTE_URL_OVERRIDES`` setting is not applied.
+        """
+        from fluent_pages.models import UrlNode_Translation   # the import can't be globally, that gives a circular dependency
+
+        language_codes = appsettings.FLUENT_PAGES_LANGUAGES.get_active_choices(language_code)
+        if pages is None:
+            ids = self.values('pk')
+        else:
+            ids = [getattr(page, 'pk', page) for page in pages]
+
+        rows = UrlNode_Translation.objects.filter(master__in=ids, language_code__in=language_codes) \
+            .values_list('master_id', 'language_code', '_cached_url')
+
+        # Pick the preferred language for each page.
+        cached_urls = {}
+        for master_id, code, cached_url in rows:
+            if master_id not in cached_urls or code == language_codes[0]:
+                cached_urls[master_id] = (code, cached_url)
+
+        # The root can be different per language (e.g. when i18n_patterns is used)
+        roots = {}
+        result = {}
+        for master_id, (code, cached_url) in cached_urls.iteritems():
+            if code not in roots:
+                with translation.override(code):
+                    try:
+                        roots[code] = reverse('fluent-page').rstrip('/')
+                    except NoReverseMatch:
+                        raise ImproperlyConfigured("Missing an include for 'fluent_pages.urls' in the URLConf")
+
+            result[master_id] = roots[code] + cached_url
+        return result
+
+
+    def _get_route_node_ids(self, paths, language_code):
+        """
+        Find the nodes of the given paths in the :class:`~fluent_pages.models.PageRoute` table.
+        The ID of the longest path is returned first.
+        The routes are kept in sync with the pages, so the published filter is also applied to the routes.
+        """
+        from fluent_pages.models import PageRoute, UrlNode   # the import can't be globally, that gives a circular dependency
+        routes = PageRoute.objects.filter(cached_url__in=paths, language_code=language_code)
+        if self._parent_site is not None:
+            routes = routes.filter(site=self._parent_site)
+        if self._published:
+            routes = routes.filter(status=UrlNode.PUBLISHED)
+            if not appsettings.FLUENT_PAGES_USE_IS_LIVE:
+                # With is_live, the dates are handled by the filter of the page.
+                routes = routes.filter(
+                    Q(publication_date__isnull=True) |
+                    Q(publication_date__lt=now())
+                ).filter(
+                    Q(publication_end_date__isnull=True) |
+                    Q(publication_end_date__gte=now())
+                )
+
+        rows = sorted(routes.values_list('cached_url', 'node_id'), key=lambda row: len(row[0]), reverse=True)
+        return [node_id for cached_url, node_id in rows]
+
+
     def _split_path_levels(self, path):
         """
         Split the URL path, used by best_match_for_path()
@@ -122,26 +229,109 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
         Return only published pages for the current site.
 
         .. versionchanged:: 0.9 This filter only returns the pages of the current site.
+        .. versionchanged:: 0.9 The :attr:`~fluent_pages.models.UrlNode.is_live` field is used when ``FLUENT_PAGES_USE_IS_LIVE`` is enabled.
         """
         from fluent_pages.models import UrlNode   # the import can't be globally, that gives a circular dependency
 
-        return self \
-            ._single_site() \
-            .filter(status=UrlNode.PUBLISHED) \
-            .filter(
-                Q(publication_date__isnull=True) |
-                Q(publication_date__lt=now())
-            ).filter(
-                Q(publication_end_date__isnull=True) |
-                Q(publication_end_date__gte=now())
-            )
+        if appsettings.FLUENT_PAGES_USE_IS_LIVE:
+            # The publication dates are handled by the update_live_pages command,
+            # which allows the database to use the index, and the query to be cached.
+            qs = self \
+                ._single_site() \
+                .filter(status=UrlNode.PUBLISHED, is_live=True)
+        else:
+            qs = self \
+                ._single_site() \
+                .filter(status=UrlNode.PUBLISHED) \
+                .filter(
+                    Q(publication_date__isnull=True) |
+                    Q(publication_date__lt=now())
+                ).filter(
+                    Q(publication_end_date__isnull=True) |
+                    Q(publication_end_date__gte=now())
+                )
+
+        qs._published = True  # Also filter the PageRoute table.
+        return qs
 
 
     def in_navigation(self):
         """
         Return only pages in the navigation.
+
+        .. versionchanged:: 0.9 The :attr:`~fluent_pages.extensions.PageTypePlugin.heavy_fields` are deferred.
+        .. versionchanged:: 0.9 The translations are prefetched, unless ``FLUENT_PAGES_PREFETCH_TRANSLATIONS`` is disabled.
+        """
+        return self.published().filter(in_navigation=True).defer_heavy_fields()._prefetch_default_translations()
+
+
+    def defer_heavy_fields(self):
+        """
+        .. versionadded:: 0.9
+           Defer the :attr:`~fluent_pages.extensions.PageTypePlugin.heavy_fields` of the page types.
+           These fields are still loaded on first access, so this is suitable for listings which don't render the page.
+        """
+        c = self._clone()
+        c._defer_heavy_fields = True
+        return c
+
+
+    def prefetch_translations(self, language_code=None):
+        """
+        .. versionadded:: 0.9
+           Fetch the translations of the active language and fallback language in a single query.
+
+        Unlike ``prefetch_related('translations')``, the other languages are not loaded.
+        The active language is determined when the queryset is evaluated, unless a ``language_code`` is given.
+        """
+        c = self._clone()
+        c._prefetch_translations = True
+        c._prefetch_language = language_code
+        return c
+
+
+    def _prefetch_for_language(self, language_code):
+        """
+        Let the translation prefetch follow the language of the lookup.
         """
-        return self.published().filter(in_navigation=True)
+        if self._prefetch_translations and self._prefetch_language is None:
+            return self.prefetch_translations(language_code)
+        else:
+            return self
+
+
+    def _prefetch_default_translations(self):
+        """
+        Apply the ``FLUENT_PAGES_PREFETCH_TRANSLATIONS`` policy to a queryset that fluent_pages builds internally.
+        """
+        if appsettings.FLUENT_PAGES_PREFETCH_TRANSLATIONS:
+            return self.prefetch_translations()
+        else:
+            return self
+
+
+    if django.VERSION >= (1, 6):
+        def _fetch_all(self):
+            fetched = self._result_cache is not None
+            super(UrlNodeQuerySet, self)._fetch_all()
+            if self._prefetch_translations and not fetched:
+                prefetch_translations(self._result_cache, self._prefetch_language)
+    else:
+        def iterator(self):
+            # Django 1.4/1.5 have no _fetch_all(), the result cache is filled from iterator() in chunks.
+            iterator = super(UrlNodeQuerySet, self).iterator()
+            if not self._prefetch_translations:
+                for obj in iterator:
+                    yield obj
+                return
+
+            while True:
+                chunk = list(islice(iterator, _ITER_CHUNK_SIZE))
+                if not chunk:
+                    return
+                prefetch_translations(chunk, self._prefetch_language)
+                for obj in chunk:
+                    yield obj
 
 
     def url_pattern_types(self):
@@ -159,6 +349,112 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
         return self.filter(parent__isnull=True)
 
 
+    def only(self, *fields):
+        """
+        Load only the given fields, and the fields which are read while the objects are constructed.
+        """
+        # django-mptt reads the parent in __init__(), and django-polymorphic reads the content type.
+        # Both would trigger a query per object otherwise. The deferred field loading also uses only().
+        return super(UrlNodeQuerySet, self).only(self.model._mptt_meta.parent_attr, 'polymorphic_ctype', *fields)
+
+
+    def update(self, **kwargs):
+        """
+        .. versionadded:: 0.9 Clear the page caches after updating the pages.
+        """
+        with invalidation_batch():
+            expire_queryset_caches(self)  # cleared when the batch ends.
+            if appsettings.FLUENT_PAGES_USE_PAGE_ROUTES:
+                self._update_page_routes(kwargs)
+
+            # Without FLUENT_PAGES_USE_IS_LIVE, the field is not read. The update_live_pages command fills it when the setting is enabled.
+            live_fields = ('status', 'publication_date', 'publication_end_date')
+            if appsettings.FLUENT_PAGES_USE_IS_LIVE and any(name in kwargs for name in live_fields):
+                # Read the IDs first, as the update could change the outcome of the filters.
+                node_ids = list(self.values_list('pk', flat=True))
+                count = super(UrlNodeQuerySet, self).update(**kwargs)
+                self._update_is_live(node_ids)
+                return count
+            else:
+                return super(UrlNodeQuerySet, self).update(**kwargs)
+    update.alters_data = True
+
+
+    def _update_is_live(self, node_ids):
+        """
+        Update the :attr:`~fluent_pages.models.UrlNode.is_live` field after the status or publication dates changed.
+        """
+        from fluent_pages.models.publishing import update_live_pages   # the import can't be globally, that gives a circular dependency
+        if node_ids:
+            update_live_pages(self.model.objects.filter(pk__in=node_ids))
+
+
+    def _update_page_routes(self, kwargs):
+        """
+        Copy the updated fields to the :class:`~fluent_pages.models.PageRoute` table.
+        """
+        from fluent_pages.models import PageRoute   # the import can't be globally, that gives a circular dependency
+        route_fields = {
+            'status': 'status',
+            'publication_date': 'publication_date',
+            'publication_end_date': 'publication_end_date',
+            'parent_site': 'site',
+            'parent_site_id': 'site_id',
+            'polymorphic_ctype': 'polymorphic_ctype',
+            'polymorphic_ctype_id': 'polymorphic_ctype_id',
+        }
+        route_kwargs = dict((route_fields[name], value) for name, value in kwargs.iteritems() if name in route_fields)
+        if route_kwargs:
+            # Read the IDs first, as the update could change the outcome of the filters.
+            node_ids = list(self.values_list('pk', flat=True))
+            PageRoute.objects.filter(node__in=node_ids).update(**route_kwargs)
+
+
+    def delete(self):
+        """
+        .. versionadded:: 0.9 Clear the page caches after deleting the pages.
+        """
+        with invalidation_batch():
+            expire_queryset_caches(self)
+            super(UrlNodeQuerySet, self).delete()
+    delete.alters_data = True
+
+
+    def _get_real_instances(self, base_result_objects):
+        """
+        Polymorphic object loader, extended to support :func:`defer_heavy_fields`.
+        """
+        # django-polymorphic doesn't support .defer() for the derived models,
+        # hence the page types with heavy fields are fetched here instead.
+        if not self._defer_heavy_fields or self.query.extra_select or self.query.aggregates:
+            return super(UrlNodeQuerySet, self)._get_real_instances(base_result_objects)
+
+        from fluent_pages.extensions import page_type_pool
+        heavy_fields = page_type_pool.get_heavy_fields()
+
+        light_objects = []
+        heavy_ids = defaultdict(list)
+        for base_object in base_result_objects:
+            if base_object.polymorphic_ctype_id in heavy_fields:
+                heavy_ids[base_object.polymorphic_ctype_id].append(base_object.pk)
+            else:
+                light_objects.append(base_object)
+
+        if not heavy_ids:
+            return super(UrlNodeQuerySet, self)._get_real_instances(base_result_objects)
+
+        results = dict((obj.pk, obj) for obj in super(UrlNodeQuerySet, self)._get_real_instances(light_objects))
+        for ct_id, idlist in heavy_ids.iteritems():
+            model, fields = heavy_fields[ct_id]
+            real_objects = model.base_objects.filter(pk__in=idlist).defer(*fields)
+            real_objects.query.select_related = self.query.select_related
+            for real_object in real_objects:
+                results[real_object.pk] = real_object
+
+        # Restore the original ordering
+        return [results[obj.pk] for obj in base_result_objects if obj.pk in results]
+
+
     def _mark_current(self, current_page):
         """
         Internal API to mark the given page as "is_current" in the resulting set.
@@ -175,6 +471,39 @@ class UrlNodeQuerySet(TranslatableQuerySet, DecoratingQuerySet, PolymorphicMPTTQ
 
 
 
+def prefetch_translations(pages, language_code=None):
+    """
+    .. versionadded:: 0.9
+       Fill the translation cache of the pages with the active language and fallback language, using a single query.
+       Languages which are not translated are marked as missing in the cache too.
+
+    This can be used for lists of pages which are not fetched by a queryset, e.g. a list read from the cache.
+    """
+    from fluent_pages.models import UrlNode_Translation   # the import can't be globally, that gives a circular dependency
+
+    pages = [page for page in pages if page.pk is not None]
+    if not pages:
+        return
+
+    language_codes = appsettings.FLUENT_PAGES_LANGUAGES.get_active_choices(language_code)
+    master_cache = UrlNode_Translation._meta.get_field('master').get_cache_name()
+
+    translations = defaultdict(list)
+    for translated in UrlNode_Translation.objects.filter(master__in=[page.pk for page in pages], language_code__in=language_codes):
+        translations[translated.master_id].append(translated)
+
+    for page in pages:
+        for translated in translations[page.pk]:
+            setattr(translated, master_cache, page)  # avoid a query when the translation reads the master.
+            page._translations_cache.setdefault(translated.language_code, translated)
+
+        # Store the marker of django-parler for missing languages,
+        # so reading a missing translation jumps to the fallback language without a query.
+        for code in language_codes:
+            page._translations_cache.setdefault(code, None)
+
+
+
 class UrlNodeManager(PolymorphicMPTTModelManager, TranslatableManager):
     """
     Extra methods attached to ``UrlNode.objects`` and ``Page.objects``.
@@ -200,6 +529,14 @@ class UrlNodeManager(PolymorphicMPTTModelManager, TranslatableManager):
         return self.get_query_set().best_match_for_path(path)
 
 
+    def get_urls(self, pages=None, language_code=None):
+        """
+        .. versionadded:: 0.9
+           Return the URLs of many pages at once, as dictionary of ``{id: url}``.
+        """
+        return self.get_query_set().get_urls(pages, language_code=language_code)
+
+
     def parent_site(self, site):
         """
         .. versionadded:: 0.9 Filter to the given site.
@@ -223,6 +560,14 @@ class UrlNodeManager(PolymorphicMPTTModelManager, TranslatableManager):
         return self.get_query_set().in_navigation()
 
 
+    def prefetch_translations(self, language_code=None):
+        """
+        .. versionadded:: 0.9
+           Fetch the translations of the active language and fallback language in a single query.
+        """
+        return self.get_query_set().prefetch_translations(language_code)
+
+
     def toplevel(self):
         """
         Return all pages which have no parent.
@@ -0,0 +1,161 @@
+"""
+Publishing or unpublishing many pages at once.
+
+The pages are updated in chunks of ``FLUENT_PAGES_BULK_CHUNK_SIZE`` pages.
+Each chunk is updated in a separate transaction, so the table is not locked for the whole selection,
+and the caches of the pages are cleared after each chunk is committed.
+
+This module also updates the :attr:`~fluent_pages.models.UrlNode.is_live` field
+when the publication date or end date of a page passes.
+With ``FLUENT_PAGES_USE_IS_LIVE = True``, the ``published()`` filter reads this field,
+and the ``update_live_pages`` management command should run periodically (or with ``--watch``).
+"""
+from django.db.models import Min, Q
+from fluent_pages import appsettings
+from fluent_pages.invalidation import invalidation_batch, expire_cache_keys, get_dependent_cache_keys
+from fluent_pages.utils.compat import now, transaction_atomic
+
+__all__ = (
+    'BulkStatusResult', 'bulk_publish', 'bulk_unpublish', 'bulk_update_status',
+    'LiveStatusResult', 'update_live_pages', 'get_next_live_change',
+)
+
+
+class BulkStatusResult(object):
+    """
+    The outcome of :func:`bulk_update_status`.
+    """
+    def __init__(self):
+        #: The number of pages that are updated.
+        self.updated = 0
+        #: The IDs of the pages which are not published, because their publication end date has passed,
+        #: or their publication date is after the end date.
+        self.invalid_ids = []
+        #: The IDs of the published pages which only become visible at their publication date.
+        self.scheduled_ids = []
+
+
+def bulk_publish(queryset, chunk_size=None):
+    """
+    Publish all pages in the queryset.
+    """
+    from fluent_pages.models import UrlNode
+    return bulk_update_status(queryset, UrlNode.PUBLISHED, chunk_size=chunk_size)
+
+
+def bulk_unpublish(queryset, chunk_size=None):
+    """
+    Change all pages in the queryset into drafts.
+    """
+    from fluent_pages.models import UrlNode
+    return bulk_update_status(queryset, UrlNode.DRAFT, chunk_size=chunk_size)
+
+
+def bulk_update_status(queryset, status, chunk_size=None):
+    """
+    Change the status of all pages in the queryset, in chunks of ``chunk_size`` pages.
+    Returns a :class:`BulkStatusResult`.
+    """
+    from fluent_pages.models import UrlNode
+    result = BulkStatusResult()
+    chunk_size = chunk_size or appsettings.FLUENT_PAGES_BULK_CHUNK_SIZE
+    date = now()
+
+    # Read the IDs first, as the update changes the outcome of the filters.
+    rows = queryset.non_polymorphic().exclude(status=status).order_by('pk') \
+        .values_list('pk', 'publication_date', 'publication_end_date')
+
+    page_ids = []
+    for pk, publication_date, publication_end_date in rows:
+        if status == UrlNode.PUBLISHED:
+            if (publication_end_date is not None and publication_end_date < date) \
+            or (publication_date is not None and publication_end_date is not None and publication_date > publication_end_date):
+                result.invalid_ids.append(pk)
+                continue
+            elif publication_date is not None and publication_date >= date:
+                result.scheduled_ids.append(pk)
+        page_ids.append(pk)
+
+    result.updated = _update_pages(page_ids, chunk_size, status=status)
+    return result
+
+
+class LiveStatusResult(object):
+    """
+    The outcome of :func:`update_live_pages`.
+    """
+    def __init__(self):
+        #: The IDs of the pages which became visible.
+        self.live_ids = []
+        #: The IDs of the pages which are no longer visible.
+        self.offline_ids = []
+
+
+def update_live_pages(queryset=None, date=None, chunk_size=None):
+    """
+    Update the :attr:`~fluent_pages.models.UrlNode.is_live` field of the pages
+    which passed their publication date or publication end date.
+    The caches of the changed pages are cleared.
+    Returns a :class:`LiveStatusResult`.
+    """
+    from fluent_pages.models import UrlNode
+    result = LiveStatusResult()
+    chunk_size = chunk_size or appsettings.FLUENT_PAGES_BULK_CHUNK_SIZE
+    if queryset is None:
+        queryset = UrlNode.objects.all()
+    if date is None:
+        date = now()
+
+    # Same filters as UrlNode.get_is_live()
+    qs = queryset.non_polymorphic().order_by('pk')
+    live_filter = Q(status=UrlNode.PUBLISHED) \
+                & (Q(publication_date__isnull=True) | Q(publication_date__lt=date)) \
+                & (Q(publication_end_date__isnull=True) | Q(publication_end_date__gte=date))
+
+    result.live_ids = list(qs.filter(live_filter, is_live=False).values_list('pk', flat=True))
+    result.offline_ids = list(qs.filter(is_live=True).exclude(live_filter).values_list('pk', flat=True))
+
+    _update_pages(result.live_ids, chunk_size, is_live=True)
+    _update_pages(result.offline_ids, chunk_size, is_live=False)
+    return result
+
+
+def get_next_live_change(date=None):
+    """
+    Return the next moment a published page becomes visible or hidden, or ``None`` when nothing is scheduled.
+    """
+    from fluent_pages.models import UrlNode
+    if date is None:
+        date = now()
+
+    qs = UrlNode.objects.non_polymorphic().filter(status=UrlNode.PUBLISHED)
+    dates = [
+        qs.filter(publication_date__gte=date).aggregate(date=Min('publication_date'))['date'],
+        qs.filter(publication_end_date__gte=date).aggregate(date=Min('publication_end_date'))['date'],
+    ]
+    dates = [d for d in dates if d is not None]
+    return min(dates) if dates else None
+
+
+def _update_pages(page_ids, chunk_size, **values):
+    """
+    Update the fields of the pages, in chunks of ``chunk_size`` pages.
+    """
+    from fluent_pages.models import UrlNode
+    updated = 0
+    for i in xrange(0, len(page_ids), chunk_size):
+        chunk = page_ids[i:i + chunk_size]
+
+        # The caches are cleared when the batch ends, after the transaction is committed.
+        with invalidation_batch():
+            with transaction_atomic():
+                # The page objects are fetched for get_dependent_cache_keys(), as the URL and page type matter.
+                keys = set()
+                for page in UrlNode.objects.filter(pk__in=chunk):
+                    keys.update(get_dependent_cache_keys(page))
+                expire_cache_keys(keys)
+
+                # Also updates the PageRoute table, and increases the tree generation.
+                updated += UrlNode.objects.filter(pk__in=chunk).update(**values)
+
+    return updated
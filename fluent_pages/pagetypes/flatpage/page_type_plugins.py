@@ -9,6 +9,7 @@ class FlatPagePlugin(PageTypePlugin):
     model = FlatPage
     model_admin = FlatPageAdmin
     sort_priority = 11
+    heavy_fields = ('content',)
 
     def get_render_template(self, request, flatpage, **kwargs):
         return flatpage.template_name
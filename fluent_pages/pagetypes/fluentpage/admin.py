@@ -3,7 +3,7 @@ from fluent_pages.models import PageLayout
 from fluent_pages.utils.ajax import JsonResponse
 from fluent_pages.utils.compat import url, patterns
 from fluent_contents.admin.placeholdereditor import PlaceholderEditorAdmin
-from fluent_contents.analyzer import get_template_placeholder_data
+from .layouts import get_cached_layout, get_default_layout
 from .widgets import LayoutSelector
 
 
@@ -65,26 +65,34 @@ class FluentPageAdmin(PlaceholderEditorAdmin, HtmlPageAdmin):
         Provides a list of :class:`fluent_contents.models.PlaceholderData` classes,
         that describe the contents of the template.
         """
-        template = self.get_page_template(obj)
-        if not template:
+        layout = self.get_page_layout(obj)
+        if not layout:
             return []
         else:
-            return get_template_placeholder_data(template)
+            return list(layout.placeholders)
 
 
     def get_page_template(self, page):
         """
         Return the template that is associated with the page.
         """
+        layout = self.get_page_layout(page)
+        return layout.template if layout is not None else None
+
+
+    def get_page_layout(self, page):
+        """
+        Return the :class:`~fluent_pages.pagetypes.fluentpage.layouts.CachedLayout` that is associated with the page.
+        The compiled template and placeholders are cached per layout.
+        """
         if page is None:
             # Add page. start with default template.
-            try:
-                return PageLayout.objects.all()[0].get_template()
-            except IndexError:
-                return None
+            return get_default_layout()
+        elif page.layout_id is None:
+            return None
         else:
             # Change page, honor template of object.
-            return page.layout.get_template()
+            return get_cached_layout(page.layout_id)
 
 
     # ---- Layout selector code ----
@@ -112,21 +120,13 @@ class FluentPageAdmin(PlaceholderEditorAdmin, HtmlPageAdmin):
         Return the metadata about a layout
         """
         try:
-            layout = PageLayout.objects.get(pk=id)
+            layout = get_cached_layout(int(id))
         except PageLayout.DoesNotExist:
             json = {'success': False, 'error': 'Layout not found'}
             status = 404
         else:
-            template = layout.get_template()
-            placeholders = get_template_placeholder_data(template)
-
             status = 200
-            json = {
-                'id': layout.id,
-                'key': layout.key,
-                'title': layout.title,
-                'placeholders': [p.as_dict() for p in placeholders],
-            }
+            json = layout.as_dict()
 
         return JsonResponse(json, status=status)
 
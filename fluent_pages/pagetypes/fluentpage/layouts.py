@@ -0,0 +1,127 @@
+"""
+A process-local cache of the layout templates, and the placeholders they define.
+
+Finding the placeholders requires compiling and walking the complete template.
+The results are kept per layout, until the layout is saved or the template file changes.
+Other processes clear their cache when the :mod:`~fluent_pages.invalidation.bus` reports a change.
+"""
+import os
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from fluent_contents.analyzer import get_template_placeholder_data
+from fluent_pages import appsettings
+from fluent_pages.invalidation import invalidation_batch, bump_tree_generation
+from fluent_pages.invalidation.bus import get_invalidation_bus
+from fluent_pages.models import PageLayout, UrlNode
+
+__all__ = (
+    'CachedLayout', 'get_cached_layout', 'get_default_layout', 'clear_layout_cache',
+)
+
+_layouts = {}              # layout id -> CachedLayout
+_default_layout_ids = []   # contains the id of the first layout, once fetched.
+_bus_connected = []        # contains True once the bus receiver is registered.
+
+
+class CachedLayout(object):
+    """
+    The metadata of a :class:`~fluent_pages.models.PageLayout`, with the compiled template.
+    """
+    def __init__(self, layout):
+        self.id = layout.id
+        self.key = layout.key
+        self.title = layout.title
+        self.template_path = layout.template_path
+        self.mtime = _get_mtime(layout.template_path)
+        self.template = layout.get_template()
+        self.placeholders = get_template_placeholder_data(self.template)
+
+    def is_stale(self):
+        """
+        Whether the template file changed since the template was compiled.
+        """
+        return _get_mtime(self.template_path) != self.mtime
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'key': self.key,
+            'title': self.title,
+            'placeholders': [p.as_dict() for p in self.placeholders],
+        }
+
+
+def get_cached_layout(layout_id):
+    """
+    Return the :class:`CachedLayout` for a layout ID.
+
+    Raises PageLayout.DoesNotExist when the layout is not found.
+    """
+    _connect_bus()
+    cached = _layouts.get(layout_id)
+    if cached is None or cached.is_stale():
+        cached = _layouts[layout_id] = CachedLayout(PageLayout.objects.get(pk=layout_id))
+    return cached
+
+
+def get_default_layout():
+    """
+    Return the :class:`CachedLayout` of the layout that new pages start with, or ``None`` when there are no layouts.
+    """
+    _connect_bus()
+    if not _default_layout_ids:
+        _default_layout_ids[:] = PageLayout.objects.values_list('pk', flat=True)[:1] or [None]
+
+    layout_id = _default_layout_ids[0]
+    if layout_id is None:
+        return None
+
+    try:
+        return get_cached_layout(layout_id)
+    except PageLayout.DoesNotExist:
+        # Deleted by another process
+        clear_layout_cache()
+        return get_default_layout()
+
+
+def clear_layout_cache(site_id=None):
+    """
+    Remove all layouts from the cache.
+    The ``site_id`` is accepted for the invalidation bus, layouts are shared by all sites.
+    """
+    _layouts.clear()
+    del _default_layout_ids[:]
+
+
+def _get_mtime(template_path):
+    # The template_path is either absolute, or relative to the FLUENT_PAGES_TEMPLATE_DIR
+    if not os.path.isabs(template_path):
+        template_path = os.path.join(appsettings.FLUENT_PAGES_TEMPLATE_DIR, template_path)
+    try:
+        return os.path.getmtime(template_path)
+    except OSError:
+        return None  # e.g. found by a different template loader
+
+
+def _connect_bus():
+    # Only processes which use the layouts (e.g. the admin) poll the bus for them,
+    # importing this module doesn't make every request poll the bus.
+    if not _bus_connected:
+        get_invalidation_bus().connect(clear_layout_cache)
+        _bus_connected.append(True)
+
+
+def _on_layout_changed(sender, instance, **kwargs):
+    clear_layout_cache()
+
+    # Let the other processes clear their cache too. The layouts are shared by all sites,
+    # so the bus is notified for every site that has pages. This happens after the transaction is committed.
+    site_ids = set(UrlNode.objects.order_by().values_list('parent_site', flat=True).distinct())
+    site_ids.add(settings.SITE_ID)
+    with invalidation_batch():
+        for site_id in site_ids:
+            bump_tree_generation(site_id)
+
+
+post_save.connect(_on_layout_changed, sender=PageLayout, dispatch_uid='fluent_pages.fluentpage.clear_layout_cache')
+post_delete.connect(_on_layout_changed, sender=PageLayout, dispatch_uid='fluent_pages.fluentpage.clear_layout_cache')
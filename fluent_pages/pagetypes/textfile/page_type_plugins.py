@@ -7,6 +7,7 @@ from fluent_pages.pagetypes.textfile.models import TextFile
 class TextFilePlugin(PageTypePlugin):
     model = TextFile
     is_file = True
+    heavy_fields = ('content',)
 
     def get_response(self, request, textfile, **kwargs):
         content_type = textfile.content_type
@@ -0,0 +1,14 @@
+"""
+Signals sent by the page models.
+
+Unlike the ``post_save`` signal of Django, these signals are sent
+after the page and all it's translations are saved, and the transaction is committed.
+When the transaction is rolled back, the signals are not sent.
+"""
+from django.dispatch import Signal
+
+#: Sent when a page is saved, after the translations and descendant URLs are updated.
+post_page_save = Signal(providing_args=["instance"])
+
+#: Sent when a page is deleted.
+post_page_delete = Signal(providing_args=["instance"])
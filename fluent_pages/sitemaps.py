@@ -14,13 +14,103 @@ This can be done using:
         url(r'^sitemap.xml$', 'django.contrib.sitemaps.views.sitemap', {'sitemaps': sitemaps}),
     )
 """
+import gzip
+import itertools
+import logging
+import os
+import re
+import tempfile
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
-from fluent_pages.models import UrlNode
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.core.urlresolvers import reverse, NoReverseMatch
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.encoding import smart_bytes
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from fluent_pages import appsettings
+from fluent_pages.models import UrlNode, UrlNode_Translation
+from fluent_pages.utils.sites import get_site, get_current_site
 
-class PageSitemap(Sitemap):
+logger = logging.getLogger(__name__)
+
+SITEMAP_INDEX_FILENAME = 'sitemap.xml'
+SITEMAP_FILENAME_RE = re.compile(r'^sitemap(-[a-zA-Z0-9_-]+-\d+\.xml\.gz|\.xml)$')
+
+
+class _AlternatesSitemapMixin(object):
+    """
+    Adding the ``<xhtml:link rel="alternate" hreflang=".." />`` entries to the sitemap URLs.
+    """
+    #: Whether the URLs of all languages should be included in each ``<url>`` entry.
+    #: This requires the ``fluent_pages/sitemap.xml`` template to render the sitemap.
+    alternates = False
+
+    def get_urls(self, page=1, site=None, protocol=None):
+        urls = super(_AlternatesSitemapMixin, self).get_urls(page=page, site=site, protocol=protocol)
+        if self.alternates and urls:
+            self._add_alternates(urls, site, protocol)
+        return urls
+
+    def get_node_id(self, item):
+        """Return the ID of the page, to find the other languages."""
+        raise NotImplementedError()
+
+    def _add_alternates(self, urls, site, protocol):
+        if self.protocol is not None:
+            protocol = self.protocol
+        if site is None:
+            site = get_current_site()
+        prefix = '{0}://{1}'.format(protocol or 'http', site.domain)
+
+        # Fetch the URLs of all languages in a single query,
+        # instead of calling UrlNode.get_absolute_urls() for every page.
+        node_ids = set(self.get_node_id(url['item']) for url in urls)
+        rows = UrlNode_Translation.objects.filter(master__in=node_ids) \
+            .order_by('master', 'language_code') \
+            .values_list('master_id', 'language_code', '_cached_url')
+
+        alternates = {}
+        for node_id, node_rows in itertools.groupby(rows, lambda row: row[0]):
+            node_rows = list(node_rows)
+            if len(node_rows) > 1:
+                alternates[node_id] = [
+                    (language_code, prefix + self.get_url_root(language_code) + cached_url)
+                    for node_id, language_code, cached_url in node_rows
+                ]
+
+        for url in urls:
+            url['alternates'] = alternates.get(self.get_node_id(url['item']), ())
+
+    def get_url_root(self, language_code):
+        """
+        Return the URL where the pages are located in the given language.
+        This is determined only once per language, as the ``fluent_pages.urls`` may be included in ``i18n_patterns()``.
+        """
+        try:
+            url_roots = self._url_roots
+        except AttributeError:
+            url_roots = self._url_roots = {}
+
+        try:
+            return url_roots[language_code]
+        except KeyError:
+            with translation.override(language_code):
+                root = reverse('fluent-page').rstrip('/')
+            url_roots[language_code] = root
+            return root
+
+
+class PageSitemap(_AlternatesSitemapMixin, Sitemap):
     """
     The sitemap definition for the pages created with *django-fluent-pages*.
     It follows the API for the :mod:`django.contrib.sitemaps <django.contrib.sitemaps>` module.
+
+    .. versionadded:: 0.9
+       Set :attr:`alternates` to ``True`` to include the URLs of the other languages.
     """
     def items(self):
         """
@@ -28,7 +118,8 @@ class PageSitemap(Sitemap):
         """
         # Note that .active_translations() can't be combined with other filters for translations__.. fields.
         return UrlNode.objects.published().non_polymorphic().active_translations() \
-                .order_by('level', 'translations__language_code', 'translations___cached_url')
+                .order_by('level', 'translations__language_code', 'translations___cached_url') \
+                ._prefetch_default_translations()
 
     def lastmod(self, urlnode):
         """Return the last modification of the page."""
@@ -37,3 +128,215 @@ class PageSitemap(Sitemap):
     def location(self, urlnode):
         """Return url of a page."""
         return urlnode.url
+
+    def get_node_id(self, urlnode):
+        return urlnode.pk
+
+
+class StreamingPageSitemap(_AlternatesSitemapMixin, Sitemap):
+    """
+    .. versionadded:: 0.9
+
+    A sitemap definition for sites with many pages.
+    Instead of fetching the page objects, it reads the ``(_cached_url, language_code, modification_date, master_id)``
+    rows of the translations directly, and iterates over them without caching the results.
+    The sitemap is split in multiple pages of :attr:`limit` items, which can be listed using
+    the ``django.contrib.sitemaps.views.index`` view.
+
+    Note that the URLs are constructed from the database values directly,
+    hence a custom :func:`~fluent_pages.models.UrlNode.get_absolute_url` or ``ABSOLUTE_URL_OVERRIDES`` is not used.
+    """
+    def __init__(self, site_id=None, languages=None):
+        self.site_id = site_id
+        self.languages = languages
+
+    def get_languages(self):
+        """
+        Return the languages to include in the sitemap.
+        By default, this is the current language and it's fallback, just like the :class:`PageSitemap`.
+        """
+        if self.languages is not None:
+            return self.languages
+        return appsettings.FLUENT_PAGES_LANGUAGES.get_active_choices()
+
+    def get_queryset(self):
+        """
+        Return the pages to include in the sitemap.
+        """
+        qs = UrlNode.objects.all()
+        if self.site_id is not None:
+            qs = qs.parent_site(self.site_id)
+        return qs.published().non_polymorphic()
+
+    def items(self):
+        """
+        Return all rows of the sitemap.
+        """
+        return UrlNode_Translation.objects \
+            .filter(master__in=self.get_queryset(), language_code__in=self.get_languages()) \
+            .order_by('master__level', 'language_code', '_cached_url') \
+            .values_list('_cached_url', 'language_code', 'master__modification_date', 'master_id')
+
+    def _get_paginator(self):
+        return _IteratingPaginator(self.items(), self.limit)
+    paginator = property(_get_paginator)
+
+    def lastmod(self, row):
+        """Return the last modification of the page."""
+        return row[2]
+
+    def location(self, row):
+        """Return url of a page."""
+        return self.get_url_root(row[1]) + row[0]
+
+    def get_node_id(self, row):
+        return row[3]
+
+
+class _IteratingPaginator(Paginator):
+    """
+    A paginator which doesn't cache the results of the page,
+    so the items are constructed while the database rows are read.
+    """
+    def page(self, number):
+        page = super(_IteratingPaginator, self).page(number)
+        page.object_list = page.object_list.iterator()
+        return page
+
+
+def get_sitemap_dir(site_id=None):
+    """
+    .. versionadded:: 0.9
+
+    Return the directory where the static sitemap files of a site are stored.
+    """
+    if not appsettings.FLUENT_PAGES_SITEMAP_DIR:
+        raise ImproperlyConfigured("The setting 'FLUENT_PAGES_SITEMAP_DIR' needs to be defined to write sitemap files.")
+    if site_id is None:
+        site_id = settings.SITE_ID
+    return os.path.join(appsettings.FLUENT_PAGES_SITEMAP_DIR, str(site_id))
+
+
+def write_sitemap_files(site, protocol='http', limit=None):
+    """
+    .. versionadded:: 0.9
+
+    Write the static sitemap files for a site.
+    For every language, the pages are written in gzip compressed files of :attr:`Sitemap.limit` URLs.
+    These files are listed in a ``sitemap.xml`` index file.
+
+    All files are written to a temporary file first, which is moved to the final location afterwards.
+    This makes sure a crawler never sees a partially written file.
+    Returns the list of written file names.
+    """
+    directory = get_sitemap_dir(site.pk)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    languages = UrlNode_Translation.objects.filter(master__parent_site=site) \
+        .order_by('language_code').values_list('language_code', flat=True).distinct()
+
+    filenames = []
+    for language_code in languages:
+        sitemap = StreamingPageSitemap(site_id=site.pk, languages=[language_code])
+        sitemap.alternates = True
+        if limit:
+            sitemap.limit = limit
+
+        paginator = sitemap.paginator
+        if not paginator.count:
+            continue
+
+        for page in paginator.page_range:
+            filename = 'sitemap-{0}-{1}.xml.gz'.format(language_code, page)
+            content = render_to_string('fluent_pages/sitemap.xml', {'urlset': sitemap.get_urls(page=page, site=site, protocol=protocol)})
+            _write_file_atomic(os.path.join(directory, filename), content, compress=True)
+            filenames.append(filename)
+
+    sitemaps = ['{0}://{1}{2}'.format(protocol, site.domain, _get_sitemap_url(name)) for name in filenames]
+    content = render_to_string('sitemap_index.xml', {'sitemaps': sitemaps})
+    _write_file_atomic(os.path.join(directory, SITEMAP_INDEX_FILENAME), content)
+
+    # Remove files which are no longer listed in the index, e.g. when pages or languages are removed.
+    for filename in os.listdir(directory):
+        if filename != SITEMAP_INDEX_FILENAME and filename not in filenames and SITEMAP_FILENAME_RE.match(filename):
+            os.remove(os.path.join(directory, filename))
+
+    return [SITEMAP_INDEX_FILENAME] + filenames
+
+
+def _get_sitemap_url(filename):
+    try:
+        return reverse('fluent-page-sitemap', kwargs={'filename': filename})
+    except NoReverseMatch:
+        return '/' + filename
+
+
+def _write_file_atomic(path, content, compress=False):
+    # The temporary file is created in the same folder, so the rename doesn't cross file systems.
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            if compress:
+                gzip_file = gzip.GzipFile(filename=os.path.basename(path)[:-3], mode='wb', fileobj=tmp_file)
+                try:
+                    gzip_file.write(smart_bytes(content))
+                finally:
+                    gzip_file.close()
+            else:
+                tmp_file.write(smart_bytes(content))
+
+        os.chmod(tmp_path, 0o644)
+        os.rename(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
+
+
+def serve_sitemap(request, filename=SITEMAP_INDEX_FILENAME):
+    """
+    .. versionadded:: 0.9
+
+    Serve the sitemap files which are written by :func:`write_sitemap_files`.
+    When ``FLUENT_PAGES_SITEMAP_SENDFILE_HEADER`` is set, the file contents is send by the web server instead.
+    """
+    if not SITEMAP_FILENAME_RE.match(filename):
+        raise Http404("Invalid sitemap file name")
+
+    path = os.path.join(get_sitemap_dir(), filename)
+    try:
+        statobj = os.stat(path)
+    except OSError:
+        raise Http404("Sitemap file not found")
+
+    # The Last-Modified header has a resolution of seconds, while st_mtime can be a float.
+    mtime = int(statobj.st_mtime)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime, statobj.st_size):
+        return HttpResponseNotModified()
+
+    content_type = 'application/x-gzip' if filename.endswith('.gz') else 'application/xml'
+    sendfile_header = appsettings.FLUENT_PAGES_SITEMAP_SENDFILE_HEADER
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if appsettings.FLUENT_PAGES_SITEMAP_SENDFILE_URL:
+            response[sendfile_header] = '{0}/{1}/{2}'.format(appsettings.FLUENT_PAGES_SITEMAP_SENDFILE_URL.rstrip('/'), settings.SITE_ID, filename)
+        else:
+            response[sendfile_header] = path
+    else:
+        with open(path, 'rb') as f:
+            response = HttpResponse(f.read(), content_type=content_type)
+        response['Content-Length'] = statobj.st_size
+
+    response['Last-Modified'] = http_date(mtime)
+    response['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    return response
+
+
+def _write_site_sitemap_files(sender, instance, **kwargs):
+    # Signal handler for FLUENT_PAGES_SITEMAP_WRITE_ON_SAVE
+    site_id = instance.parent_site_id or settings.SITE_ID
+    try:
+        write_sitemap_files(get_site(site_id))
+    except (IOError, OSError):
+        # The page is saved already, the next save or the write_sitemaps command can write the files again.
+        logger.exception("Failed to write the sitemap files of site %s", site_id)
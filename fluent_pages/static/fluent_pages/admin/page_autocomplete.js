@@ -0,0 +1,70 @@
+/*
+    The PageAutocompleteWidget, which fetches the matching pages while typing.
+*/
+
+
+(function($)
+{
+  var DELAY = 250;
+
+  function onInput(event) {
+    var $input = $(this);
+    clearTimeout($input.data('timer'));
+    $input.data('timer', setTimeout(function() { fetchPages($input); }, DELAY));
+  }
+
+  function fetchPages($input) {
+    var query = $input.val();
+    if( query == $input.data('last-query') ) {
+      return;
+    }
+    $input.data('last-query', query);
+
+    $.getJSON($input.attr('data-url'), {'q': query}, function(pages) {
+      if( query != $input.val() ) {
+        return;  // outdated response
+      }
+      showResults($input, pages);
+    });
+  }
+
+  function showResults($input, pages) {
+    var $list = getResultList($input).empty();
+    $.each(pages, function(i, page) {
+      $('<li/>').text(page.title).css('padding-left', (page.level + 0.5) + 'em').data('page', page).appendTo($list);
+    });
+    $list.toggle(pages.length > 0);
+  }
+
+  function getResultList($input) {
+    var $list = $input.next('ul.page-autocomplete-results');
+    if( ! $list.length ) {
+      $list = $('<ul class="page-autocomplete-results"/>').hide().insertAfter($input);
+      $list.delegate('li', 'mousedown', function(event) {
+        var page = $(this).data('page');
+        $('#' + $input.attr('data-for')).val(page.id).change();
+        $input.val(page.title).data('last-query', page.title);
+        $list.hide();
+        event.preventDefault();
+      });
+    }
+    return $list;
+  }
+
+  function onBlur(event) {
+    var $input = $(this);
+    if( $input.val() == '' ) {
+      // Allow clearing the selection
+      $('#' + $input.attr('data-for')).val('').change();
+    }
+    getResultList($input).hide();
+  }
+
+  $.fn.ready( function() {
+    // Using delegate() instead of on(), as the admin of Django 1.4 and 1.5 ships jQuery 1.4.2.
+    // The blur event doesn't bubble, focusout does.
+    $(document)
+      .delegate('input.vPageAutocomplete', 'input', onInput)
+      .delegate('input.vPageAutocomplete', 'focusout', onBlur);
+  });
+})(window.jQuery || django.jQuery);
@@ -21,6 +21,7 @@ from django.template import Library
 from django.utils.encoding import smart_str
 from fluent_pages.models.db import UrlNode
 from fluent_pages.urlresolvers import mixed_reverse
+from fluent_pages.utils.identitymap import get_identity_map
 from tag_parser.basetags import BaseNode
 
 register = Library()
@@ -49,6 +50,8 @@ class AppUrlNode(BaseNode):
             page = context.get('page')
             if not isinstance(page, UrlNode):
                 page = None
+            elif request is not None:
+                page = get_identity_map(request).add(page)
 
         # Try a normal URLConf URL, then an app URL
         return mixed_reverse(view_name, args=url_args, kwargs=url_kwargs, current_app=context.current_app, current_page=page)
@@ -6,10 +6,13 @@ Load this module using:
 
     {% load fluent_pages_tags %}
 """
-from django.contrib.sites.models import Site
 from django.template import Library, TemplateSyntaxError
+from fluent_pages import appsettings
 from fluent_pages.models import UrlNode, Page
+from fluent_pages.models.caches import get_navigation_pages
 from fluent_pages.models.navigation import PageNavigationNode
+from fluent_pages.utils.identitymap import get_identity_map
+from fluent_pages.utils.sites import get_current_site
 from tag_parser import template_tag
 from tag_parser.basetags import BaseInclusionNode, BaseNode
 
@@ -85,7 +88,7 @@ class MenuNode(BaseInclusionNode):
             if isinstance(parent_value, basestring):
                 # if we've been provided a string then we lookup based on the path/url
                 try:
-                    parent = UrlNode.objects.get_for_path(parent_value)
+                    parent = get_identity_map(request).get_for_path(parent_value)
                 except UrlNode.DoesNotExist:
                     return {'menu_items': []}
                 top_pages = parent.children.in_navigation()  # Can't do parent___cached_key due to polymorphic queryset code.
@@ -97,8 +100,10 @@ class MenuNode(BaseInclusionNode):
                 top_pages = parent_value.children.in_navigation()
             else:
                 raise TemplateSyntaxError("The 'render_menu' tag only allows an URL path, page id or page object for the 'parent' keyword")
+        elif appsettings.FLUENT_PAGES_CACHE_PAGE_TREE and appsettings.FLUENT_PAGES_FILTER_SITE_ID:
+            # otherwise get the top level nav for the current page, from the cache (which holds the current site only).
+            top_pages = get_navigation_pages(current_page=current_page)
         else:
-            # otherwise get the top level nav for the current page
             top_pages = UrlNode.objects.toplevel_navigation(current_page=current_page)
 
         # Construct a PageNavigationNode for every page, that allows simple iteration of the tree.
@@ -134,7 +139,7 @@ class GetVarsNode(BaseNode):
             # Detect current site
             request = _get_request(context)
             current_page = None
-            current_site = Site.objects.get_current()
+            current_site = get_current_site()
 
             # Allow {% render_menu %} to operate.
             dummy_page = UrlNode(title='', in_navigation=False, override_url=request.path, status=UrlNode.DRAFT, parent_site=current_site)
@@ -172,7 +177,7 @@ def _get_current_page(context):
         except KeyError:
             try:
                 # Then try looking up environmental properties.
-                current_page = UrlNode.objects.get_for_path(request.path)
+                current_page = get_identity_map(request).get_for_path(request.path)
             except UrlNode.DoesNotExist, e:
                 # Be descriptive. This saves precious developer time.
                 raise UrlNode.DoesNotExist("Could not detect current page.\n"
@@ -182,7 +187,7 @@ def _get_current_page(context):
         if not isinstance(current_page, UrlNode):
             raise UrlNode.DoesNotExist("The 'page' context variable is not a valid page")
 
-        request._current_fluent_page = current_page
+        request._current_fluent_page = get_identity_map(request).add(current_page)
 
     return request._current_fluent_page  # is a UrlNode
 
@@ -7,4 +7,10 @@ from .urldispatcher import UrlDispatcherTests, UrlDispatcherNonRootTests
 from .menu import MenuTests
 from .modeldata import ModelDataTests
 from .plugins import PluginTests, PluginUrlTests
+from .sitemaps import SitemapTests, SitemapFilesTests
+from .invalidation import InvalidationTests, InvalidationTransactionTests
+from .invalidation_bus import InvalidationBusTests
+from .caches import PageCachesTests
 from .templatetags import TemplateTagTests
+from .admin import PageAdminTests
+from .layouts import LayoutCacheTests
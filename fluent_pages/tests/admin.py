@@ -0,0 +1,302 @@
+import copy
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from StringIO import StringIO
+from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test.client import RequestFactory
+from django.utils import translation
+from fluent_pages import appsettings
+from fluent_pages.admin import PageAdminForm
+from fluent_pages.admin.pageadmin import _select_template_name, _cached_name_lookups
+from fluent_pages.forms.fields import TemplateFilePathField
+from fluent_pages.models import Page
+from fluent_pages.models.publishing import bulk_unpublish
+from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.tests.testapp.models import SimpleTextPage
+from fluent_pages.utils.compat import get_user_model, now
+from fluent_pages.utils.templatefiles import get_template_choices
+
+
+class PageAdminTests(AppTestCase):
+    """
+    Tests for the page admin.
+    """
+
+    @classmethod
+    def setUpTree(cls):
+        root = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=cls.user, override_url='/')
+        SimpleTextPage.objects.create(title="Root2", slug="root2", status=SimpleTextPage.DRAFT, author=cls.user)
+
+        SimpleTextPage.objects.create(title="Level1a", slug="level1a", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Level1b", slug="level1b", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+
+
+    def setUp(self):
+        self.user.set_password('admin')
+        self.user.save()
+        self.client.login(username='admin', password='admin')
+
+
+    def test_lazy_tree_nodes(self):
+        """
+        The lazy tree fetches the child nodes with a single query.
+        """
+        model_admin = admin.site._registry[Page]
+        request = RequestFactory().get('/admin/fluent_pages/page/api/tree-nodes/')
+        request.user = self.user
+
+        with translation.override('en-us'):
+            with self.assertNumQueries(1):
+                roots = model_admin.get_tree_nodes(request)
+
+            self.assertEqual(len(roots), 2)
+            self.assertIn('Home', roots[0]['label'])
+            self.assertIn('href="/"', roots[0]['label'])  # preview link
+            self.assertTrue(roots[0]['children'][0]['is_placeholder'])
+            self.assertNotIn('children', roots[1])
+            self.assertTrue(roots[1]['can_have_children'])
+
+            with self.assertNumQueries(1):
+                children = model_admin.get_tree_nodes(request, roots[0]['id'])
+
+            self.assertEqual([node['id'] for node in children], list(Page.objects.filter(parent=roots[0]['id']).values_list('pk', flat=True)))
+            self.assertIn('Level1a', children[0]['label'])
+            self.assertIn('href="/level1a/"', children[0]['label'])
+
+
+    def test_lazy_tree_view(self):
+        """
+        The tree nodes are returned as JSON.
+        """
+        root = Page.objects.get(translations__slug='home')
+
+        with translation.override('en-us'):
+            response = self.client.get('/admin/fluent_pages/page/api/tree-nodes/', {'parent': root.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+        response = self.client.get('/admin/fluent_pages/page/api/tree-nodes/', {'parent': 'foo'})
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_lazy_tree_translations(self):
+        """
+        Nodes without a translation in the current language are displayed with another translation.
+        """
+        model_admin = admin.site._registry[Page]
+        request = RequestFactory().get('/admin/fluent_pages/page/api/tree-nodes/')
+        request.user = self.user
+
+        page = SimpleTextPage(status=SimpleTextPage.DRAFT, author=self.user)
+        page.set_current_language('nl')
+        page.title = "Alleen NL"
+        page.slug = 'alleen-nl'
+        page.save()
+
+        with translation.override('en-us'):
+            roots = model_admin.get_tree_nodes(request)
+        self.assertEqual([node['id'] for node in roots][-1], page.pk)
+        self.assertIn('Alleen NL', roots[-1]['label'])
+
+
+    def test_api_permissions(self):
+        """
+        The JSON views require the change permission of pages.
+        """
+        staff = get_user_model().objects.create_user('staff', 'staff@example.com', 'staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username='staff', password='staff')
+
+        self.assertEqual(self.client.get('/admin/fluent_pages/page/api/tree-nodes/').status_code, 403)
+        self.assertEqual(self.client.get('/admin/fluent_pages/page/api/page-choices/', {'q': 'level'}).status_code, 403)
+
+
+    def test_lazy_changelist(self):
+        """
+        The lazy changelist only renders the root nodes.
+        """
+        model_admin = admin.site._registry[Page]
+        model_admin.lazy_tree = True
+        try:
+            response = self.client.get('/admin/fluent_pages/page/')
+            self.assertContains(response, '/admin/fluent_pages/page/api/tree-nodes/')
+            self.assertEqual(len(response.context['cl'].result_list), 2)
+
+            # Searching displays the regular list
+            response = self.client.get('/admin/fluent_pages/page/', {'q': 'Level1a'})
+            self.assertNotContains(response, '/admin/fluent_pages/page/api/tree-nodes/')
+        finally:
+            del model_admin.lazy_tree
+
+
+    def test_url_validation(self):
+        """
+        The admin form checks the URL with a single query, which the save method reuses.
+        """
+        class SimpleTextPageForm(PageAdminForm):
+            language_code = 'en-us'
+
+            class Meta:
+                model = SimpleTextPage
+                fields = ('title', 'slug', 'override_url', 'parent', 'contents')
+
+        root = Page.objects.get(translations__slug='home')
+        data = {'parent': root.pk, 'title': "Level1c", 'slug': 'level1a', 'contents': "test"}
+
+        form = SimpleTextPageForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('slug', form.errors)
+
+        data['slug'] = 'level1c'
+        form = SimpleTextPageForm(data)
+        self.assertTrue(form.is_valid())
+        with self.assertNumQueries(2):  # parent URL, unique check
+            form.clean()
+
+        form.instance.author = self.user
+        form.save_translated_fields()
+        page = form.save()
+        self.assertEqual(page.slug, 'level1c')
+        self.assertEqual(page.get_absolute_url(), '/level1c/')
+
+        # A duplicate slug is allowed when the URL is free, the slug is made unique while saving.
+        SimpleTextPage.objects.create(title="Level1d", slug="level1d", parent=root, override_url='/other/', status=SimpleTextPage.PUBLISHED, author=self.user)
+        data['slug'] = 'level1d'
+        form = SimpleTextPageForm(data)
+        self.assertTrue(form.is_valid())
+        form.instance.author = self.user
+        form.save_translated_fields()
+        page = form.save()
+        self.assertEqual(page.slug, 'level1d-2')
+        self.assertEqual(page.get_absolute_url(), '/level1d-2/')
+
+
+    def test_template_choices(self):
+        """
+        The template listing is cached, until a directory changes.
+        """
+        path = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(path, 'sub'))
+            for filename in ('base.html', 'sub/page.html', 'sub/style.css'):
+                open(os.path.join(path, filename), 'w').close()
+
+            choices = get_template_choices(path, r'.*\.html$', recursive=True)
+            self.assertEqual([title for filename, title in choices], ['/base.html', '/sub/page.html'])
+
+            # Adding a file changes the modification time of the directory.
+            # The times are set explicitly, as the filesystem might only store seconds.
+            sub = os.path.join(path, 'sub')
+            open(os.path.join(sub, 'new.html'), 'w').close()
+            os.utime(sub, (0, 0))
+            self.assertEqual(len(get_template_choices(path, r'.*\.html$', recursive=True)), 3)
+
+            # Without changes in the modification times, the cached data is returned.
+            open(os.path.join(sub, 'other.html'), 'w').close()
+            os.utime(sub, (0, 0))
+            self.assertEqual(len(get_template_choices(path, r'.*\.html$', recursive=True)), 3)
+            self.assertEqual(len(get_template_choices(path, r'.*\.html$', recursive=True, refresh=True)), 4)
+
+            # The form field reads the cached listing, without listing the directory.
+            old_relative = appsettings.FLUENT_PAGES_RELATIVE_TEMPLATE_DIR
+            old_listdir = os.listdir
+            appsettings.FLUENT_PAGES_RELATIVE_TEMPLATE_DIR = True
+            listed = []
+            os.listdir = lambda dirname: listed.append(dirname) or old_listdir(dirname)
+            try:
+                field = TemplateFilePathField(path, match=r'.*\.html$', recursive=True, required=False)
+            finally:
+                appsettings.FLUENT_PAGES_RELATIVE_TEMPLATE_DIR = old_relative
+                os.listdir = old_listdir
+            self.assertEqual(listed, [])
+            self.assertEqual([title for filename, title in field.choices], ['---------', '/base.html', '/sub/new.html', '/sub/other.html', '/sub/page.html'])
+            self.assertEqual(list(field.widget.choices), list(field.choices))
+        finally:
+            shutil.rmtree(path)
+
+
+    def test_change_form_template(self):
+        """
+        The change form resolves the templates once, and doesn't query the content type.
+        """
+        page = Page.objects.get(translations__slug='level1a')
+        response = self.client.get('/admin/fluent_pages/page/{0}/'.format(page.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['ct_id'], ContentType.objects.get_for_model(SimpleTextPage).pk)
+        self.assertEqual(response.context['default_change_form_template'], 'admin/fluent_pages/page/change_form.html')
+
+        # Missing templates are cached too
+        self.assertIsNone(_select_template_name(['admin/fluent_pages/missing.html']))
+        self.assertIn(('admin/fluent_pages/missing.html',), _cached_name_lookups)
+
+
+    def test_page_choices(self):
+        """
+        The PageChoiceField reads the cached list of pages.
+        """
+        from fluent_pages.forms.fields import PageChoiceField
+
+        with translation.override('en-us'):
+            field = copy.deepcopy(PageChoiceField(required=False))
+            with self.assertNumQueries(1):
+                choices = list(field.choices)
+            self.assertEqual([label for pk, label in choices], [
+                u'---------', u' Home', u'&nbsp;&nbsp; Level1a', u'&nbsp;&nbsp; Level1b',  # Root2 is a draft
+            ])
+
+            # Second form uses the cache
+            field = copy.deepcopy(PageChoiceField(required=False))
+            with self.assertNumQueries(0):
+                self.assertEqual(len(list(field.choices)), 4)
+
+            # The autocomplete widget doesn't render all pages.
+            page = Page.objects.get(translations__slug='level1a')
+            field = PageChoiceField(autocomplete=True)
+            html = field.widget.render('page', page.pk, {'id': 'id_page'})
+            self.assertIn('value="Level1a"', html)
+            self.assertNotIn('Level1b', html)
+
+            response = self.client.get('/admin/fluent_pages/page/api/page-choices/', {'q': 'level1'})
+            self.assertEqual([choice['title'] for choice in json.loads(response.content)], ['Level1a', 'Level1b'])
+
+
+    def test_make_published(self):
+        """
+        The publish action skips pages which can't be published.
+        """
+        root2 = Page.objects.get(translations__slug='root2')
+        level1b = Page.objects.get(translations__slug='level1b')
+        Page.objects.filter(pk=level1b.pk).update(status=Page.DRAFT, publication_end_date=now() - timedelta(days=1))
+
+        response = self.client.post('/admin/fluent_pages/page/', {
+            'action': 'make_published',
+            ACTION_CHECKBOX_NAME: [root2.pk, level1b.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Page.objects.get(pk=root2.pk).status, Page.PUBLISHED)
+        self.assertEqual(Page.objects.get(pk=level1b.pk).status, Page.DRAFT)
+
+        result = bulk_unpublish(Page.objects.all(), chunk_size=1)
+        self.assertEqual(result.updated, 3)
+        self.assertEqual(Page.objects.filter(status=Page.PUBLISHED).count(), 0)
+
+
+    def test_publish_pages_command(self):
+        """
+        The publish_pages command selects pages by ID or URL.
+        """
+        root = Page.objects.get(translations__slug='home')
+        Page.objects.update(status=Page.DRAFT)
+
+        call_command('publish_pages', urls=['/level1a/'], language='en-us', stdout=StringIO())
+        self.assertEqual(list(Page.objects.filter(status=Page.PUBLISHED).values_list('translations__slug', flat=True)), ['level1a'])
+
+        call_command('publish_pages', str(root.pk), descendants=True, stdout=StringIO())
+        self.assertEqual(Page.objects.filter(status=Page.PUBLISHED).count(), 3)
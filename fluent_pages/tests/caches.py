@@ -0,0 +1,99 @@
+from StringIO import StringIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.client import RequestFactory
+from django.utils import translation
+from fluent_pages.invalidation import get_tree_cache_key
+from fluent_pages.models import UrlNode
+from fluent_pages.models.caches import get_route_table, get_navigation_pages
+from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.tests.testapp.models import SimpleTextPage, WebShopPage
+from fluent_pages.views.dispatcher import CmsPageDispatcher
+
+
+class PageCachesTests(AppTestCase):
+    """
+    Tests for the cached route table and navigation.
+    """
+
+    @classmethod
+    def setUpTree(cls):
+        root = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=cls.user, override_url='/')
+        SimpleTextPage.objects.create(title="Level1", slug="level1", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Draft1", slug="draft1", status=SimpleTextPage.DRAFT, author=cls.user)
+        WebShopPage.objects.create(title="Shop1", slug="shop", status=SimpleTextPage.PUBLISHED, author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        # The tree reset of the next test case doesn't remove the rows of the page types
+        # that derive from the Page proxy model, which would conflict with the new pages.
+        WebShopPage.objects.all().delete()
+
+    def setUp(self):
+        translation.activate('en-us')
+
+    def tearDown(self):
+        translation.deactivate()
+
+
+    def test_route_table(self):
+        """
+        The route table should contain all published URLs, and be renewed on changes.
+        """
+        self.assertEqual(sorted(get_route_table()), ['/', '/level1/', '/shop/'])
+
+        with self.assertNumQueries(0):
+            get_route_table()
+
+        draft = SimpleTextPage.objects.get(translations__slug='draft1')
+        draft.status = SimpleTextPage.PUBLISHED
+        draft.save()
+        self.assertEqual(sorted(get_route_table()), ['/', '/draft1/', '/level1/', '/shop/'])
+
+
+    def test_dispatcher_route_table(self):
+        """
+        Paths which are not found in the route table should be rejected without querying the database.
+        """
+        view = CmsPageDispatcher(request=RequestFactory().get('/level1/'), kwargs={})
+        view.language_code = 'en-us'
+        view.use_route_table = True
+
+        self.assertEqual(view.get_object('/level1/').slug, 'level1')
+        self.assertEqual(view.get_best_match_object('/shop/foo/').slug, 'shop')
+        self.assertRaises(UrlNode.DoesNotExist, lambda: view.get_object('/not-found/'))  # also reads the table of the fallback language.
+        with self.assertNumQueries(0):
+            self.assertRaises(UrlNode.DoesNotExist, lambda: view.get_object('/not-found/'))
+            self.assertRaises(UrlNode.DoesNotExist, lambda: view.get_best_match_object('/not-found/foo/'))
+
+        # A new page changes the tree generation, so the table is renewed.
+        page = UrlNode.objects.get(translations__slug='level1')
+        SimpleTextPage.objects.create(title="New", slug="new", parent=page, status=SimpleTextPage.PUBLISHED, author=self.user)
+        self.assertEqual(view.get_object('/level1/new/').slug, 'new')
+
+
+    def test_navigation_pages(self):
+        """
+        The toplevel menu items should be read from the cache.
+        """
+        expected = [page.pk for page in UrlNode.objects.toplevel_navigation()]
+        self.assertEqual([page.pk for page in get_navigation_pages()], expected)
+
+        current_page = UrlNode.objects.get(translations__slug='shop')
+        with self.assertNumQueries(0):
+            pages = get_navigation_pages(current_page=current_page)
+            self.assertEqual([page.title for page in pages], ['Home', 'Shop1'])
+            self.assertEqual([page.url for page in pages], ['/', '/shop/'])
+            self.assertEqual([page.is_current for page in pages], [False, True])
+
+
+    def test_warm_page_caches(self):
+        """
+        The command should fill the caches for all languages.
+        """
+        out = StringIO()
+        call_command('warm_page_caches', stdout=out)
+        self.assertTrue('en\t routes: 0 entries' in out.getvalue())  # pages are created in en-us
+        self.assertTrue('nl\t navigation: ' in out.getvalue())
+        self.assertTrue('app_reverse: 1 entries' in out.getvalue())
@@ -0,0 +1,207 @@
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from fluent_pages import invalidation
+from fluent_pages.invalidation import invalidation_batch, expire_cache_keys, register_dependent_keys, _dependent_key_functions, \
+    get_tree_cache_key, get_tree_generation
+from fluent_pages.signals import post_page_save
+from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.tests.testapp.models import SimpleTextPage
+from fluent_pages.utils.compat import get_user_model, transaction_atomic
+
+
+class InvalidationTests(AppTestCase):
+    """
+    Tests for the cache invalidation.
+    """
+
+    @classmethod
+    def setUpTree(cls):
+        root = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=cls.user, override_url='/')
+        level1 = SimpleTextPage.objects.create(title="Level1", slug="level1", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Level2a", slug="level2a", parent=level1, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Level2b", slug="level2b", parent=level1, status=SimpleTextPage.PUBLISHED, author=cls.user)
+
+    def setUp(self):
+        self.deleted = []
+        self.old_delete_many = cache.delete_many
+
+        def delete_many(keys, *args, **kwargs):
+            self.deleted.append(sorted(keys))
+            return self.old_delete_many(keys, *args, **kwargs)
+        cache.delete_many = delete_many
+
+    def tearDown(self):
+        cache.delete_many = self.old_delete_many
+
+
+    def test_batch(self):
+        """
+        Keys are cleared once, when the outermost batch ends.
+        """
+        cache.set('test.key1', 1)
+        with invalidation_batch():
+            with invalidation_batch():
+                expire_cache_keys(['test.key1'])
+                expire_cache_keys(['test.key1', 'test.key2'])
+            self.assertEqual(cache.get('test.key1'), 1)
+
+        self.assertEqual(cache.get('test.key1'), None)
+        self.assertEqual(self.deleted, [['test.key1', 'test.key2']])
+
+
+    def test_update_descendants(self):
+        """
+        Changing the URL of a page clears the keys of all descendants at once.
+        """
+        @register_dependent_keys
+        def get_test_keys(page):
+            return ['test.page.{0}'.format(page.pk)]
+
+        try:
+            level1 = SimpleTextPage.objects.get(translations__slug='level1')
+            level1.slug = 'level1-new'
+            level1.save()
+        finally:
+            _dependent_key_functions.remove(get_test_keys)
+
+        page_ids = sorted(SimpleTextPage.objects.filter(translations___cached_url__startswith='/level1-new/').values_list('pk', flat=True))
+        self.assertEqual(len(page_ids), 3)
+        self.assertEqual(self.deleted, [sorted(
+            ['fluent_pages.instance_of.SimpleTextPage'] + ['test.page.{0}'.format(pk) for pk in page_ids]
+        )])
+
+
+    def test_tree_generation(self):
+        """
+        Saving, moving and deleting pages renews the tree cache keys.
+        """
+        key1 = get_tree_cache_key('menu', None, 'en')
+        self.assertEqual(get_tree_cache_key('menu', None, 'en'), key1)
+
+        level2a = SimpleTextPage.objects.get(translations__slug='level2a')
+        level2a.save()
+        key2 = get_tree_cache_key('menu', None, 'en')
+        self.assertNotEqual(key2, key1)
+
+        level2a.move_to(SimpleTextPage.objects.get(translations__slug='home'), 'last-child')
+        key3 = get_tree_cache_key('menu', None, 'en')
+        self.assertNotEqual(key3, key2)
+
+        generation = get_tree_generation()
+        level2a.delete()
+        self.assertEqual(get_tree_generation(), generation + 1)  # increased once
+
+
+    def test_queryset_update(self):
+        """
+        Bulk updates clear the caches of the affected page types once.
+        """
+        generation = get_tree_generation()
+        SimpleTextPage.objects.filter(translations__slug__startswith='level2').update(status=SimpleTextPage.DRAFT)
+
+        self.assertEqual(self.deleted, [['fluent_pages.instance_of.SimpleTextPage']])
+        self.assertEqual(get_tree_generation(), generation + 1)
+
+
+
+class InvalidationTransactionTests(TransactionTestCase):
+    """
+    Tests for the cache invalidation, with transactions that are actually committed.
+    The TestCase of Django 1.4/1.5 replaces the transaction functions, so this uses a TransactionTestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        Site.objects.get_or_create(id=settings.SITE_ID, defaults=dict(domain='django.localhost', name='django at localhost'))
+        user, _ = get_user_model().objects.get_or_create(is_superuser=True, is_staff=True, username="admin")
+        self.page = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=user, override_url='/')
+
+        self.deleted = []
+        self.old_delete_many = cache.delete_many
+
+        def delete_many(keys, *args, **kwargs):
+            self.deleted.append(sorted(keys))
+            return self.old_delete_many(keys, *args, **kwargs)
+        cache.delete_many = delete_many
+
+    def tearDown(self):
+        cache.delete_many = self.old_delete_many
+
+
+    def test_batch_transaction(self):
+        """
+        Inside a transaction, the keys are cleared after the outer block is committed.
+        """
+        cache.set('test.key1', 1)
+        with transaction_atomic():
+            with transaction_atomic():
+                with invalidation_batch():
+                    expire_cache_keys(['test.key1'])
+            self.assertEqual(cache.get('test.key1'), 1)
+
+            generation = get_tree_generation()
+            self.page.save()
+            if hasattr(connection, 'in_atomic_block'):
+                # Django 1.4/1.5 already commit the whole transaction when the commit_on_success block of save() ends.
+                self.assertEqual(get_tree_generation(), generation)
+                self.assertEqual(self.deleted, [])
+
+        self.assertEqual(cache.get('test.key1'), None)
+        self.assertEqual(self.deleted, [['test.key1']])
+        self.assertNotEqual(get_tree_generation(), generation)
+        self.assertFalse(invalidation._state.pending_site_ids)
+
+
+    def test_run_on_commit(self):
+        """
+        The callbacks run after the transaction is committed, and not after a rollback.
+        """
+        called = []
+        with transaction_atomic():
+            Site.objects.filter(pk=settings.SITE_ID).update(name='committed')
+            invalidation._run_on_commit(lambda: called.append('committed'))
+            self.assertEqual(called, [])
+        self.assertEqual(called, ['committed'])
+
+        try:
+            with transaction_atomic():
+                Site.objects.filter(pk=settings.SITE_ID).update(name='rolled back')
+                invalidation._run_on_commit(lambda: called.append('rolled back'))
+                raise ValueError("rollback")
+        except ValueError:
+            pass
+        self.assertEqual(called, ['committed'])
+        self.assertFalse(invalidation._state.pending_callbacks)
+
+
+    def test_signal_transaction(self):
+        """
+        The post_page_save signal is sent after the transaction is committed.
+        """
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance.pk)
+        post_page_save.connect(receiver)
+
+        try:
+            with transaction_atomic():
+                self.page.save()
+                if hasattr(connection, 'in_atomic_block'):
+                    self.assertEqual(saved, [])  # Django 1.4/1.5 commit at the end of save()
+            self.assertEqual(saved, [self.page.pk])
+
+            if hasattr(connection, 'in_atomic_block'):
+                # Only atomic blocks can roll back the save.
+                try:
+                    with transaction_atomic():
+                        self.page.save()
+                        raise ValueError("rollback")
+                except ValueError:
+                    pass
+                self.assertEqual(saved, [self.page.pk])
+        finally:
+            post_page_save.disconnect(receiver)
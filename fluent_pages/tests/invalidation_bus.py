@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from django.core.cache import cache
+from fluent_pages import appsettings
+from fluent_pages.invalidation import bump_tree_generation, _get_generation_key
+from fluent_pages.invalidation.bus import CacheGenerationBus, UnixSocketBus
+from fluent_pages.tests.utils import AppTestCase
+
+
+class InvalidationBusTests(AppTestCase):
+    """
+    Tests for the invalidation bus backends.
+    """
+    def test_cache_generation_bus(self):
+        """
+        The cache backend detects changes of other processes by polling the generation.
+        """
+        bus = CacheGenerationBus()
+        bus.interval = 0
+        cleared = []
+        bus.connect(cleared.append)
+
+        bus.poll(4)
+        self.assertEqual(cleared, [])
+
+        bump_tree_generation(4)  # as if another process changed the tree.
+        bus.poll(4)
+        self.assertEqual(cleared, [4])
+
+        bus.poll(4)
+        self.assertEqual(cleared, [4])
+
+
+    def test_cache_generation_bus_publish(self):
+        """
+        The changes of other processes are still detected after this process published a change.
+        """
+        bus = CacheGenerationBus()
+        bus.interval = 0
+        cleared = []
+        bus.connect(cleared.append)
+        bus.poll(4)
+
+        # The change of this process is not reported twice.
+        cache.incr(_get_generation_key(4))
+        bus.publish(4)
+        bus.poll(4)
+        self.assertEqual(cleared, [4])
+
+        # Another process changed the tree before this process published it's own change.
+        cache.incr(_get_generation_key(4))
+        cache.incr(_get_generation_key(4))
+        bus.publish(4)
+        bus.poll(4)
+        self.assertEqual(cleared, [4, 4, 4])
+
+
+    def test_cache_generation_bus_interval(self):
+        """
+        The cache is read at most once per poll interval.
+        """
+        bus = CacheGenerationBus()
+        bus.interval = 3600
+        cleared = []
+        bus.connect(cleared.append)
+
+        bus.poll(4)
+        bump_tree_generation(4)
+        bus.poll(4)
+        self.assertEqual(cleared, [])
+
+
+    def test_unix_socket_bus(self):
+        """
+        The socket backend sends the changes to the other processes.
+        """
+        old_socket_dir = appsettings.FLUENT_PAGES_INVALIDATION_SOCKET_DIR
+        appsettings.FLUENT_PAGES_INVALIDATION_SOCKET_DIR = tempfile.mkdtemp()
+        try:
+            sender = UnixSocketBus()
+            receiver = UnixSocketBus()
+            cleared = []
+            receiver.connect(cleared.append)
+            receiver.poll()  # creates the socket
+
+            sender.publish(4)
+            receiver.poll()
+            self.assertEqual(cleared, [4])
+
+            receiver._socket.close()
+            sender._socket.close()
+        finally:
+            shutil.rmtree(appsettings.FLUENT_PAGES_INVALIDATION_SOCKET_DIR)
+            appsettings.FLUENT_PAGES_INVALIDATION_SOCKET_DIR = old_socket_dir
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.utils import unittest
+from fluent_pages.invalidation.bus import CacheGenerationBus
+from fluent_pages.models import PageLayout
+from fluent_pages.tests.utils import AppTestCase
+
+try:
+    from fluent_pages.pagetypes.fluentpage import layouts
+except ImportError:
+    layouts = None  # fluent_contents is not installed
+
+
+@unittest.skipIf(layouts is None, "The layout cache requires django-fluent-contents")
+class LayoutCacheTests(AppTestCase):
+    """
+    Tests for the process-local cache of the page layouts.
+    """
+
+    def setUp(self):
+        self.layout = PageLayout.objects.create(key='base', title="Base", template_path='testapp/base.html')
+        layouts.clear_layout_cache()
+
+    def test_cached_layout(self):
+        """
+        The layout should be read once, and returned from the cache afterwards.
+        """
+        cached = layouts.get_default_layout()
+        self.assertEqual(cached.key, 'base')
+
+        with self.assertNumQueries(0):
+            self.assertIs(layouts.get_cached_layout(self.layout.pk), cached)
+            self.assertIs(layouts.get_default_layout(), cached)
+
+    def test_layout_saved(self):
+        """
+        Saving a layout clears the cache of this process, and the bus reports it to other processes.
+        """
+        other_bus = CacheGenerationBus()  # the bus of another process.
+        other_bus.interval = 0
+        cleared = []
+        other_bus.connect(cleared.append)
+        other_bus.poll(settings.SITE_ID)
+
+        cached = layouts.get_cached_layout(self.layout.pk)
+        self.layout.title = "Base layout"
+        self.layout.save()
+        cached2 = layouts.get_cached_layout(self.layout.pk)
+        self.assertIsNot(cached2, cached)
+        self.assertEqual(cached2.title, "Base layout")
+
+        other_bus.poll(settings.SITE_ID)
+        self.assertEqual(cleared, [settings.SITE_ID])
+
+    def test_layout_deleted(self):
+        """
+        Deleting a layout is also reported to other processes.
+        """
+        other_bus = CacheGenerationBus()
+        other_bus.interval = 0
+        cleared = []
+        other_bus.connect(cleared.append)
+        other_bus.poll(settings.SITE_ID)
+
+        self.layout.delete()
+        other_bus.poll(settings.SITE_ID)
+        self.assertEqual(cleared, [settings.SITE_ID])
+        self.assertIsNone(layouts.get_default_layout())
@@ -1,3 +1,4 @@
+from django.utils import translation
 from fluent_pages.models import Page
 from fluent_pages.models.navigation import PageNavigationNode
 from fluent_pages.tests.utils import AppTestCase
@@ -94,3 +95,34 @@ class MenuTests(AppTestCase):
 
         self.assertEqual(children[0].is_active, True)
         self.assertEqual(children[1].is_active, False)
+
+
+    def test_menu_defers_heavy_fields(self):
+        """
+        The menu items should not fetch the heavy fields of the page types.
+        """
+        from fluent_pages.tests.testapp.page_type_plugins import SimpleTextPagePlugin  # Import here as it needs an existing DB
+        root = Page.objects.get_for_path('/')
+        children = list(root.children.in_navigation())
+
+        self.assertIsInstance(children[0], SimpleTextPage)
+        self.assertNotIn('contents', children[0].__dict__)
+        self.assertIs(children[0].plugin.__class__, SimpleTextPagePlugin)
+
+        # The field is still loaded on demand.
+        with self.assertNumQueries(1):
+            self.assertEqual(children[0].contents, '')
+
+
+    def test_menu_prefetch_translations(self):
+        """
+        The menu items should read their translations in a single query.
+        """
+        translation.activate('en-us')
+        try:
+            with self.assertNumQueries(3):  # pages, page types, translations
+                menu = list(Page.objects.in_navigation())
+            with self.assertNumQueries(0):
+                self.assertEqual(sorted(page.title for page in menu), ['Home', 'Level1a', 'Level1b', 'Root2'])
+        finally:
+            translation.deactivate()
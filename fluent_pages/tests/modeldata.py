@@ -1,9 +1,20 @@
 import django
+import re
+from datetime import timedelta
+from StringIO import StringIO
 from django.core.exceptions import ValidationError
-from fluent_pages.models import Page
+from django.core.management import call_command
+from django.db import connection
+from django.utils import unittest
+from django.utils.importlib import import_module
+from fluent_pages import appsettings
+from fluent_pages.models import Page, PageRoute, UrlNode_Translation
+from fluent_pages.models.db import update_page_routes
 from fluent_pages.models.fields import PageTreeForeignKey
 from fluent_pages.models.managers import UrlNodeQuerySet
+from fluent_pages.models.publishing import update_live_pages, get_next_live_change
 from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.utils.compat import now
 from fluent_pages.tests.testapp.models import SimpleTextPage, PlainTextFile, WebShopPage
 
 
@@ -59,6 +70,33 @@ class ModelDataTests(AppTestCase):
         self.assertRaises(Page.DoesNotExist, lambda: Page.objects.best_match_for_path('level1/level2'))
 
 
+    def test_get_urls(self):
+        """
+        The URLs of many pages should be returned in a single query.
+        """
+        with self.assertNumQueries(1):
+            urls = Page.objects.get_urls([self.root, self.level2.pk, self.shop], language_code='en-us')
+        self.assertEqual(urls, {
+            self.root.pk: '/',
+            self.level2.pk: '/level1/level2/',
+            self.shop.pk: '/shop/',
+        })
+
+        self.assertEqual(Page.objects.published().toplevel().get_urls(language_code='en-us'), {
+            self.root.pk: '/',
+            self.root2.pk: '/root2/',
+            self.shop.pk: '/shop/',
+        })
+
+        # Pages which are not translated in the language, use the fallback language.
+        UrlNode_Translation.objects.create(master=self.level1, language_code='nl', title='Niveau1', slug='niveau1', _cached_url='/niveau1/')
+        UrlNode_Translation.objects.create(master=self.root, language_code='en', title='Home', slug='home', _cached_url='/')
+        self.assertEqual(Page.objects.get_urls([self.root, self.level1, self.level2], language_code='nl'), {
+            self.root.pk: '/',
+            self.level1.pk: '/niveau1/',
+        })
+
+
     def test_split_path_levels(self):
         """
         Test the splitting of URL paths, which is the core of best_match_for_path()
@@ -205,3 +243,162 @@ class ModelDataTests(AppTestCase):
             self.assertRaisesMessage(ValidationError, PageTreeForeignKey.default_error_messages['no_children_allowed'], lambda: text_file2.full_clean())
         else:
             self.assertRaises(ValidationError, lambda: text_file2.full_clean())
+
+
+    def test_prefetch_translations(self):
+        """
+        Only the active and fallback language should be prefetched, including missing languages.
+        """
+        UrlNode_Translation.objects.create(master=self.level1, language_code='nl', title='Niveau1', slug='niveau1', _cached_url='/niveau1/')
+        UrlNode_Translation.objects.create(master=self.level1, language_code='de', title='Stufe1', slug='stufe1', _cached_url='/stufe1/')
+
+        with self.assertNumQueries(2):
+            pages = list(Page.objects.filter(pk__in=(self.root.pk, self.level1.pk)).non_polymorphic().prefetch_translations('nl'))
+
+        with self.assertNumQueries(0):
+            root, level1 = sorted(pages, key=lambda page: page.pk)
+            self.assertEqual(sorted(level1._translations_cache.keys()), ['en', 'nl'])
+            self.assertTrue(level1.has_translation('nl'))
+            self.assertFalse(root.has_translation('nl'))
+            self.assertFalse(root.has_translation('en'))
+
+        # The lookup language is prefetched
+        page = Page.objects.prefetch_translations().get_for_path('/niveau1/', language_code='nl')
+        self.assertEqual(sorted(page._translations_cache.keys()), ['en', 'nl'])
+
+
+    def test_page_routes(self):
+        """
+        The paths should be resolved via the PageRoute table, which follows the changes of the pages.
+        """
+        appsettings.FLUENT_PAGES_USE_PAGE_ROUTES = True
+        try:
+            update_page_routes()
+            self.assertEqual(PageRoute.objects.count(), UrlNode_Translation.objects.count())
+
+            with self.assertNumQueries(2):  # route, page
+                self.assertEqual(Page.objects.non_polymorphic().get_for_path('/level1/level2/', language_code='en-us').pk, self.level2.pk)
+            self.assertEqual(Page.objects.best_match_for_path('/level1/level2/foo/bar/'), self.level2)
+            self.assertEqual(Page.objects.best_match_for_path('/level1/level2'), self.level1)
+            self.assertRaises(Page.DoesNotExist, lambda: Page.objects.get_for_path('/level1/level2'))
+
+            # The routes of sub pages are updated too.
+            level1 = SimpleTextPage.objects.get(pk=self.level1.pk)
+            level1.slug = 'level1b'
+            level1.save()
+            self.assertEqual(Page.objects.get_for_path('/level1b/level2/'), self.level2)
+            self.assertRaises(Page.DoesNotExist, lambda: Page.objects.get_for_path('/level1/level2/'))
+
+            # Bulk updates and deletes are handled.
+            Page.objects.filter(pk=self.level2.pk).update(status=Page.DRAFT)
+            self.assertEqual(PageRoute.objects.get(node=self.level2.pk).status, Page.DRAFT)
+            with self.assertNumQueries(1):  # the unpublished route is not followed.
+                self.assertRaises(Page.DoesNotExist, lambda: Page.objects.published().get_for_path('/level1b/level2/'))
+            self.assertEqual(Page.objects.published().best_match_for_path('/level1b/level2/foo/'), self.level1)
+
+            Page.objects.get(pk=self.level1.pk).delete()
+            self.assertFalse(PageRoute.objects.filter(cached_url__startswith='/level1b/').exists())
+        finally:
+            appsettings.FLUENT_PAGES_USE_PAGE_ROUTES = False
+
+
+    def test_page_routes_translations(self):
+        """
+        Saving or deleting a translation directly should update the PageRoute table too.
+        """
+        appsettings.FLUENT_PAGES_USE_PAGE_ROUTES = True
+        try:
+            update_page_routes()
+            translation = UrlNode_Translation.objects.create(master=self.root2, language_code='nl', title='Wortel2', slug='wortel2', _cached_url='/wortel2/')
+            self.assertEqual(Page.objects.all().get_for_path('/wortel2/', language_code='nl'), self.root2)
+
+            translation._cached_url = '/wortel2b/'
+            translation.save()
+            self.assertEqual(Page.objects.all().get_for_path('/wortel2b/', language_code='nl'), self.root2)
+            self.assertRaises(Page.DoesNotExist, lambda: Page.objects.all().get_for_path('/wortel2/', language_code='nl'))
+
+            translation.delete()
+            self.assertFalse(PageRoute.objects.filter(node=self.root2.pk, language_code='nl').exists())
+            self.assertRaises(Page.DoesNotExist, lambda: Page.objects.all().get_for_path('/wortel2b/', language_code='nl'))
+        finally:
+            appsettings.FLUENT_PAGES_USE_PAGE_ROUTES = False
+
+
+    def test_is_live(self):
+        """
+        With FLUENT_PAGES_USE_IS_LIVE, the published pages are read from the is_live field, which update_live_pages() maintains.
+        """
+        date = now()
+        page = SimpleTextPage.objects.create(title="Scheduled", slug="scheduled", status=SimpleTextPage.PUBLISHED, author=self.user,
+                                             publication_date=date + timedelta(hours=1))
+        self.assertFalse(page.is_live)
+        self.assertTrue(Page.objects.get(pk=self.level1.pk).is_live)
+        self.assertFalse(Page.objects.get(pk=self.draft1.pk).is_live)
+
+        # Bulk updates only maintain the field when the setting is enabled.
+        Page.objects.filter(pk=self.draft1.pk).update(status=Page.PUBLISHED)
+        self.assertFalse(Page.objects.get(pk=self.draft1.pk).is_live)
+        Page.objects.filter(pk=self.draft1.pk).update(status=Page.DRAFT)
+
+        appsettings.FLUENT_PAGES_USE_IS_LIVE = True
+        try:
+            self.assertFalse(Page.objects.published().filter(pk=page.pk).exists())
+            self.assertEqual(get_next_live_change(date), page.publication_date)
+
+            result = update_live_pages(date=date + timedelta(hours=2))
+            self.assertEqual(result.live_ids, [page.pk])
+            self.assertEqual(result.offline_ids, [])
+            self.assertTrue(Page.objects.published().filter(pk=page.pk).exists())
+
+            # Bulk updates of the status also update the field.
+            Page.objects.filter(pk=page.pk).update(status=Page.DRAFT)
+            self.assertFalse(Page.objects.get(pk=page.pk).is_live)
+            self.assertFalse(Page.objects.published().filter(pk=page.pk).exists())
+
+            # The command reports the pages which are changed.
+            Page.objects.filter(pk=self.level1.pk).update(is_live=False)
+            stdout = StringIO()
+            call_command('update_live_pages', stdout=stdout)
+            self.assertIn('1 pages became visible', stdout.getvalue())
+            self.assertTrue(Page.objects.get(pk=self.level1.pk).is_live)
+        finally:
+            appsettings.FLUENT_PAGES_USE_IS_LIVE = False
+
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Query plan format is SQLite specific")
+    def test_query_plans(self):
+        """
+        The frequently executed queries should be resolved using an index.
+        """
+        if django.VERSION < (1, 5):
+            # syncdb only creates the composite indexes of Meta.index_together on Django 1.5+,
+            # on Django 1.4 they are created by the South migration.
+            try:
+                migration = import_module('fluent_pages.migrations.0011_add_composite_indexes').Migration()
+            except ImportError:
+                self.skipTest("The composite indexes are created by South on Django 1.4")
+            migration.forwards(None)
+            self.addCleanup(migration.backwards, None)
+
+        def get_plan(qs):
+            sql, params = qs.query.sql_with_params()
+            cursor = connection.cursor()
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return u'\n'.join(row[-1] for row in cursor.fetchall())
+
+        # The table, and the leading columns of the index that should be used (as regex).
+        queries = (
+            ('fluent_pages_urlnode_translation', r'language_code=\? AND _cached_url=\?',
+             Page.objects.filter(translations___cached_url='/level1/', translations__language_code='en-us', parent_site=self.root.parent_site_id)),
+            # Django 1.4/1.5 filter parent__isnull with a join, so parent_id is not part of the index lookup there.
+            ('fluent_pages_urlnode', r'parent_site_id=\? AND status=\? AND in_navigation=\?',
+             Page.objects.in_navigation().toplevel()),
+            ('fluent_pages_urlnode', r'parent_site_id=\? AND status=\? AND in_navigation=\? AND parent_id=\?',
+             self.root.children.in_navigation()),
+            # Also resolved by the unique (language_code, master) index.
+            ('fluent_pages_urlnode_translation', r'(language_code=\? AND master_id=\?|master_id=\? AND language_code=\?)',
+             UrlNode_Translation.objects.filter(master__in=[self.root.pk], language_code__in=['en-us', 'en'])),
+        )
+        for table, columns, qs in queries:
+            plan = get_plan(qs)
+            self.assertTrue(re.search(r'SEARCH (TABLE )?{0} USING (COVERING )?INDEX \w+ \({1}'.format(table, columns), plan), plan)
@@ -0,0 +1,200 @@
+import gzip
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.test.client import RequestFactory
+from fluent_pages import appsettings
+from fluent_pages.models import UrlNode_Translation
+from fluent_pages import sitemaps
+from fluent_pages.sitemaps import PageSitemap, StreamingPageSitemap, write_sitemap_files, serve_sitemap, _write_site_sitemap_files
+from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.tests.testapp.models import SimpleTextPage, PlainTextFile
+
+
+class SitemapTests(AppTestCase):
+    """
+    Tests for the sitemaps integration.
+    """
+
+    @classmethod
+    def setUpTree(cls):
+        root = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=cls.user, override_url='/')
+        SimpleTextPage.objects.create(title="Level1", slug="level1", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Draft1", slug="draft1", parent=root, status=SimpleTextPage.DRAFT, author=cls.user)
+        PlainTextFile.objects.create(slug='README', parent=root, status=PlainTextFile.PUBLISHED, author=cls.user, content="This is the README")
+
+
+    def test_page_sitemap(self):
+        """
+        The sitemap should list all published pages.
+        """
+        urls = PageSitemap().get_urls(site=Site(domain='example.com'))
+        self.assertEqual([url['location'] for url in urls], [
+            'http://example.com/',
+            'http://example.com/README',
+            'http://example.com/level1/',
+        ])
+
+
+    def test_page_sitemap_alternates(self):
+        """
+        The sitemap can include the URLs of all languages, fetched in a single query.
+        """
+        # The test pages are created in 'en-us', which has no parent URLs for the other languages.
+        for slug, nl_slug, nl_url in (('home', 'thuis', '/'), ('level1', 'niveau1', '/niveau1/')):
+            page = SimpleTextPage.objects.get(translations__slug=slug)
+            UrlNode_Translation.objects.create(master=page, language_code='nl', title=nl_slug, slug=nl_slug, _cached_url=nl_url)
+
+        site = Site(domain='example.com')
+        # Count the queries without alternates, like assertNumQueries() does.
+        old_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            PageSitemap().get_urls(site=site)
+            default_queries = len(connection.queries) - start
+        finally:
+            connection.use_debug_cursor = old_debug_cursor
+
+        sitemap = PageSitemap()
+        sitemap.alternates = True
+        with self.assertNumQueries(default_queries + 1):
+            urls = sitemap.get_urls(site=site)
+
+        alternates = dict((url['location'], list(url['alternates'])) for url in urls)
+        self.assertEqual(alternates['http://example.com/level1/'], [
+            ('en-us', 'http://example.com/level1/'),
+            ('nl', 'http://example.com/niveau1/'),
+        ])
+        self.assertEqual(alternates['http://example.com/README'], [])
+
+        xml = render_to_string('fluent_pages/sitemap.xml', {'urlset': urls})
+        self.assertTrue('<xhtml:link rel="alternate" hreflang="nl" href="http://example.com/niveau1/" />' in xml)
+
+
+    def test_streaming_sitemap(self):
+        """
+        The streaming sitemap should produce the same URLs from the database rows.
+        """
+        site = Site(domain='example.com')
+        expected = PageSitemap().get_urls(site=site)
+
+        with self.assertNumQueries(2):  # count + page
+            urls = StreamingPageSitemap().get_urls(site=site)
+
+        self.assertEqual([url['location'] for url in urls], [url['location'] for url in expected])
+        self.assertEqual([url['lastmod'] for url in urls], [url['lastmod'] for url in expected])
+
+
+    def test_streaming_sitemap_pages(self):
+        """
+        The streaming sitemap can be split into multiple files.
+        """
+        site = Site(domain='example.com')
+        sitemap = StreamingPageSitemap()
+        sitemap.limit = 2
+
+        self.assertEqual(sitemap.paginator.num_pages, 2)
+        self.assertEqual([url['location'] for url in sitemap.get_urls(page=2, site=site)], ['http://example.com/level1/'])
+
+
+
+class SitemapFilesTests(AppTestCase):
+    """
+    Tests for the static sitemap files.
+    """
+
+    @classmethod
+    def setUpTree(cls):
+        root = SimpleTextPage.objects.create(title="Home", slug="home", status=SimpleTextPage.PUBLISHED, author=cls.user, override_url='/')
+        SimpleTextPage.objects.create(title="Level1", slug="level1", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Level2", slug="level2", parent=root, status=SimpleTextPage.PUBLISHED, author=cls.user)
+        SimpleTextPage.objects.create(title="Draft1", slug="draft1", parent=root, status=SimpleTextPage.DRAFT, author=cls.user)
+
+    def setUp(self):
+        self.old_sitemap_dir = appsettings.FLUENT_PAGES_SITEMAP_DIR
+        appsettings.FLUENT_PAGES_SITEMAP_DIR = tempfile.mkdtemp()
+        self.site = Site.objects.get(pk=settings.SITE_ID)
+
+    def tearDown(self):
+        shutil.rmtree(appsettings.FLUENT_PAGES_SITEMAP_DIR)
+        appsettings.FLUENT_PAGES_SITEMAP_DIR = self.old_sitemap_dir
+        appsettings.FLUENT_PAGES_SITEMAP_SENDFILE_HEADER = None
+
+
+    def test_write_sitemap_files(self):
+        """
+        The sitemap files should be split per language, and listed in the index.
+        """
+        filenames = write_sitemap_files(self.site, limit=2)
+        self.assertEqual(filenames, ['sitemap.xml', 'sitemap-en-us-1.xml.gz', 'sitemap-en-us-2.xml.gz'])
+
+        directory = os.path.join(appsettings.FLUENT_PAGES_SITEMAP_DIR, str(settings.SITE_ID))
+        self.assertEqual(sorted(os.listdir(directory)), sorted(filenames))  # no temporary files left.
+
+        with open(os.path.join(directory, 'sitemap.xml')) as f:
+            index = f.read()
+        self.assertTrue('<loc>http://django.localhost/sitemap-en-us-2.xml.gz</loc>' in index)
+
+        gzip_file = gzip.open(os.path.join(directory, 'sitemap-en-us-2.xml.gz'))
+        try:
+            shard = gzip_file.read()
+        finally:
+            gzip_file.close()
+        self.assertTrue('<loc>http://django.localhost/level2/</loc>' in shard)
+        self.assertFalse('draft1' in shard)
+
+        # Stale files are removed
+        write_sitemap_files(self.site)
+        self.assertEqual(sorted(os.listdir(directory)), ['sitemap-en-us-1.xml.gz', 'sitemap.xml'])
+
+
+    def test_write_on_save_error(self):
+        """
+        A failure to write the files when a page is saved should be logged, not raised.
+        """
+        # A directory inside a regular file can't be created.
+        directory = appsettings.FLUENT_PAGES_SITEMAP_DIR
+        filename = os.path.join(directory, 'file')
+        open(filename, 'w').close()
+        appsettings.FLUENT_PAGES_SITEMAP_DIR = os.path.join(filename, 'sitemaps')
+
+        errors = []
+        old_exception = sitemaps.logger.exception
+        sitemaps.logger.exception = lambda msg, *args: errors.append(msg % args)
+        try:
+            _write_site_sitemap_files(sender=SimpleTextPage, instance=SimpleTextPage.objects.get(translations__slug='level1'))
+        finally:
+            sitemaps.logger.exception = old_exception
+            appsettings.FLUENT_PAGES_SITEMAP_DIR = directory
+        self.assertEqual(errors, ["Failed to write the sitemap files of site {0}".format(settings.SITE_ID)])
+
+
+    def test_serve_sitemap(self):
+        """
+        The sitemap view should serve the written files.
+        """
+        write_sitemap_files(self.site)
+        factory = RequestFactory()
+
+        response = serve_sitemap(factory.get('/sitemap.xml'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertTrue('sitemap-en-us-1.xml.gz' in response.content)
+
+        response = serve_sitemap(factory.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']))
+        self.assertEqual(response.status_code, 304)
+
+        appsettings.FLUENT_PAGES_SITEMAP_SENDFILE_HEADER = 'X-Sendfile'
+        response = serve_sitemap(factory.get('/sitemap-en-us-1.xml.gz'), filename='sitemap-en-us-1.xml.gz')
+        self.assertEqual(response['Content-Type'], 'application/x-gzip')
+        self.assertEqual(response['X-Sendfile'], os.path.join(appsettings.FLUENT_PAGES_SITEMAP_DIR, str(settings.SITE_ID), 'sitemap-en-us-1.xml.gz'))
+        self.assertEqual(response.content, '')
+
+        self.assertRaises(Http404, lambda: serve_sitemap(factory.get('/sitemap-nl-1.xml.gz'), filename='sitemap-nl-1.xml.gz'))
+        self.assertRaises(Http404, lambda: serve_sitemap(factory.get('/x'), filename='../sitemap.xml'))
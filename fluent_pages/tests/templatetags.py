@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.template import Template, Context
+from django.test.client import RequestFactory
+from fluent_pages.models import UrlNode
 from fluent_pages.tests.utils import AppTestCase
+from fluent_pages.utils.identitymap import get_identity_map
+from fluent_pages.utils.sites import get_current_site
 from fluent_pages.tests.testapp.models import SimpleTextPage
 import re
 
@@ -34,3 +40,38 @@ class TemplateTagTests(AppTestCase):
                 """{'title':"Level1b','url':"/level1b/",'active':false},"""
             """]},"""
             """{'title':"Root2','url':"/root2/",'active':false},]""")
+
+
+    def test_page_vars_site(self):
+        """
+        The site of the page should be read from the site cache.
+        """
+        page = SimpleTextPage.objects.get(translations__slug='level1a')
+        request = RequestFactory().get('/level1a/')
+        request._current_fluent_page = page
+
+        get_current_site()  # make sure the cache is filled
+        with self.assertNumQueries(0):
+            self.assertEqual(page.parent_site.pk, settings.SITE_ID)
+
+        template = Template('{% load fluent_pages_tags %}{% get_fluent_page_vars %}{{ site.domain }}')
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(Context({'request': request})), 'django.localhost')
+
+
+    def test_menu_identity_map(self):
+        """
+        Pages should only be fetched once while rendering the template.
+        """
+        request = RequestFactory().get('/level1a/')
+        template = Template('{% load fluent_pages_tags %}{% render_breadcrumb %}{% render_menu parent="/" %}{% render_menu parent="/" %}{% render_menu parent="/missing/" %}')
+        template.render(Context({'request': request}))
+
+        identity_map = get_identity_map(request)
+        current_page = request._current_fluent_page
+        self.assertIs(identity_map.get(current_page.pk), current_page)
+        self.assertEqual(sorted(identity_map.paths.values()), [None, current_page.parent_id, current_page.pk])
+
+        with self.assertNumQueries(0):
+            self.assertIs(identity_map.get_for_path('/level1a/'), current_page)
+            self.assertRaises(UrlNode.DoesNotExist, lambda: identity_map.get_for_path('/missing/'))
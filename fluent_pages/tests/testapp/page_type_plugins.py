@@ -10,6 +10,7 @@ class SimpleTextPagePlugin(PageTypePlugin):
     """
     model = SimpleTextPage
     render_template = "testapp/simpletextpage.html"
+    heavy_fields = ('contents',)
 
 
 @page_type_pool.register
@@ -19,6 +20,7 @@ class PlainTextFilePlugin(PageTypePlugin):
     """
     model = PlainTextFile
     is_file = True
+    heavy_fields = ('content',)
 
     def get_response(self, request, textfile, **kwargs):
         return HttpResponse(
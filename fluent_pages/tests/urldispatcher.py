@@ -1,7 +1,11 @@
+import re
+from django.db import connection
+from fluent_pages import appsettings
 from fluent_pages.models import Page, UrlNode
 from fluent_pages.tests.utils import AppTestCase, script_name, override_settings
 from fluent_pages.tests.testapp.models import SimpleTextPage, PlainTextFile, WebShopPage
 from fluent_pages.views.dispatcher import _try_languages, _get_fallback_language
+from fluent_pages.views.instrumentation import get_stats_backend, MemoryStatsBackend
 
 
 class UrlDispatcherTests(AppTestCase):
@@ -176,6 +180,43 @@ class UrlDispatcherTests(AppTestCase):
 
 
 
+    def test_instrumentation(self):
+        """
+        The stages of the dispatcher should be measured, and reported to the stats backend and Server-Timing header.
+        """
+        appsettings.FLUENT_PAGES_STATS_BACKEND = 'fluent_pages.views.instrumentation.MemoryStatsBackend'
+        appsettings.FLUENT_PAGES_SERVER_TIMING = True
+        try:
+            backend = get_stats_backend()
+            self.assertIsInstance(backend, MemoryStatsBackend)
+            use_debug_cursor = connection.use_debug_cursor
+
+            response = self.client.get('/sibling1/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+            self.assertEqual(sorted(backend.timings.keys()), [
+                'fluent_pages.dispatcher.get_response',
+                'fluent_pages.dispatcher.node',
+                'fluent_pages.dispatcher.render',
+                'fluent_pages.dispatcher.total',
+            ])
+            self.assertTrue(backend.counters['fluent_pages.dispatcher.node.queries'] > 0)
+            self.assertNotIn('fluent_pages.dispatcher.render.queries', backend.counters)
+            self.assertTrue(re.search(r', render;dur=[0-9.]+, total;', response['Server-Timing']), response['Server-Timing'])
+            self.assertTrue(re.match(r'^get_response;dur=[0-9.]+;desc="\d+ queries", node;', response['Server-Timing']), response['Server-Timing'])
+
+            # The fallback stages are measured too.
+            backend.reset()
+            self.assert404('/not-found/')
+            self.assertIn('fluent_pages.dispatcher.appnode', backend.timings)
+            self.assertIn('fluent_pages.dispatcher.total', backend.timings)
+            self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+        finally:
+            appsettings.FLUENT_PAGES_STATS_BACKEND = None
+            appsettings.FLUENT_PAGES_SERVER_TIMING = False
+
+
+
 class UrlDispatcherNonRootTests(AppTestCase):
     """
     Tests for URL resolving with a non-root URL include.
@@ -1,5 +1,6 @@
 from functools import wraps
 from django.conf import settings, UserSettingsHolder
+from django.core.cache import cache
 from django.core.management import call_command
 from django.core.urlresolvers import get_script_prefix, set_script_prefix
 from django.contrib.sites.models import Site
@@ -7,6 +8,7 @@ from django.db.models import loading
 from django.template.loaders import app_directories
 from django.test import TestCase
 from django.utils.importlib import import_module
+from fluent_pages import invalidation
 from fluent_pages.models.db import UrlNode
 from fluent_pages.utils.compat import get_user_model
 import os
@@ -64,6 +66,21 @@ class AppTestCase(TestCase):
         pass
 
 
+    def _pre_setup(self):
+        super(AppTestCase, self)._pre_setup()
+        # The database changes are rolled back after each test, the tree generation in the cache is not.
+        cache.clear()
+
+        # The test runs inside a transaction which is never committed.
+        # Let the cache invalidation treat it as the committed state.
+        invalidation._committed_depth = invalidation._get_transaction_depth()
+
+
+    def _post_teardown(self):
+        invalidation._committed_depth = 0
+        super(AppTestCase, self)._post_teardown()
+
+
     def assert200(self, url, msg_prefix=''):
         """
         Test that an URL exists.
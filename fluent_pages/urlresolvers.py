@@ -98,13 +98,13 @@ def _get_pages_of_type(model, language_code=None):
     if language_code is None:
         language_code = get_language()
 
-    cachekey = 'fluent_pages.instance_of.{0}'.format(model.__name__)
+    cachekey = _get_pages_of_type_cache_key(model)
     pages = cache.get(cachekey)
     if not pages:
         pages = UrlNode.objects.published().non_polymorphic().instance_of(model).only(
             'parent', 'lft',  # add fields read by MPTT, otherwise .only() causes infinite loop in django-mptt 0.5.2
             'id'              # for Django 1.3
-        )
+        )._prefetch_default_translations()
 
         # Short cache time of 1 hour, take into account that the publication date can affect this value.
         pages = list(pages)   # Make output consistent with non-cached version
@@ -118,11 +118,19 @@ def _get_pages_of_type(model, language_code=None):
     return pages
 
 
+def _get_pages_of_type_cache_key(model):
+    return 'fluent_pages.instance_of.{0}'.format(model.__name__)
+
+
 def clear_app_reverse_cache():
     """
     Clear the cache for the :func:`app_reverse` function.
     This only has to be called when doing bulk update/delete actions that circumvent the individual model classes.
+
+    .. versionchanged:: 0.9
+       The ``update()`` and ``delete()`` methods of the :class:`~fluent_pages.models.UrlNode` queryset
+       clear this cache automatically.
     """
     from fluent_pages.extensions import page_type_pool
-    for model in page_type_pool.get_model_classes():
-        cache.delete('fluent_pages.instance_of.{0}'.format(model.__name__))
+    from fluent_pages.invalidation import expire_cache_keys
+    expire_cache_keys([_get_pages_of_type_cache_key(model) for model in page_type_pool.get_model_classes()])
@@ -8,7 +8,7 @@ from django.db import transaction
 __all__ = (
     'now', 'get_user_model', 'get_user_model_name', 'user_model_label',
     'patterns', 'url', 'include',
-    'transaction_atomic',
+    'transaction_atomic', 'force_unicode',
 )
 
 
@@ -55,3 +55,11 @@ try:
     transaction_atomic = transaction.atomic
 except AttributeError:
     transaction_atomic = transaction.commit_on_success
+
+
+# Python 3 compatible name in Django 1.5
+try:
+    from django.utils.encoding import force_text as force_unicode
+except ImportError:
+    # Django 1.4
+    from django.utils.encoding import force_unicode
@@ -0,0 +1,78 @@
+"""
+A request-scoped identity map of the pages.
+
+The view and template tags all look up pages by their path.
+Storing the results at the request object makes sure the same page is only fetched once
+while a response is generated, and that all lookups receive the same object.
+"""
+from django.utils.translation import get_language
+
+
+class PageIdentityMap(object):
+    """
+    The pages fetched during a request, by ID and by path.
+    """
+    def __init__(self):
+        self.pages = {}  # pk -> UrlNode
+        self.paths = {}  # (language_code, path) -> pk, or None when the page does not exist.
+
+
+    def add(self, page, path=None, language_code=None):
+        """
+        Register a page that was fetched elsewhere.
+        When a page with the same ID is already known, that object is returned instead.
+        """
+        if page.pk is None:
+            return page  # e.g. the dummy page of {% get_fluent_page_vars %}
+
+        page = self.pages.setdefault(page.pk, page)
+        if path is not None:
+            self.paths[(language_code or get_language(), path)] = page.pk
+        return page
+
+
+    def get(self, pk):
+        """
+        Return a page that was previously fetched, or ``None``.
+        """
+        return self.pages.get(pk)
+
+
+    def get_for_path(self, path, language_code=None):
+        """
+        Return the page for the given path, like :func:`UrlNode.objects.get_for_path()
+        <fluent_pages.models.managers.UrlNodeQuerySet.get_for_path>` does.
+        Paths which don't exist are remembered too.
+
+        Raises UrlNode.DoesNotExist when the item is not found.
+        """
+        from fluent_pages.models import UrlNode   # the import can't be globally, that gives a circular dependency
+
+        if language_code is None:
+            language_code = get_language()
+
+        key = (language_code, path)
+        try:
+            pk = self.paths[key]
+        except KeyError:
+            try:
+                page = UrlNode.objects.all().get_for_path(path, language_code=language_code)
+            except UrlNode.DoesNotExist:
+                self.paths[key] = None
+                raise
+            return self.add(page, path, language_code)
+
+        if pk is None:
+            raise UrlNode.DoesNotExist(u"No published {0} found for the path '{1}'".format(UrlNode.__name__, path))
+        return self.pages[pk]
+
+
+def get_identity_map(request):
+    """
+    Return the :class:`PageIdentityMap` of the request.
+    """
+    try:
+        return request._fluent_pages_identity_map
+    except AttributeError:
+        request._fluent_pages_identity_map = PageIdentityMap()
+        return request._fluent_pages_identity_map
@@ -0,0 +1,28 @@
+"""
+Caching of the ``Site`` objects.
+"""
+from django.conf import settings
+from django.contrib.sites import models as sites_models
+
+
+def get_site(site_id):
+    """
+    Return the :class:`~django.contrib.sites.models.Site` object for the given ID.
+
+    The object is stored in the same process-level cache that ``Site.objects.get_current()`` uses,
+    which is cleared by Django when a site is saved or deleted.
+    """
+    # Read the SITE_CACHE attribute each time, as Site.objects.clear_cache() replaces the dict.
+    try:
+        return sites_models.SITE_CACHE[site_id]
+    except KeyError:
+        site = sites_models.Site.objects.get(pk=site_id)
+        sites_models.SITE_CACHE[site_id] = site
+        return site
+
+
+def get_current_site():
+    """
+    Return the :class:`~django.contrib.sites.models.Site` object of the ``SITE_ID`` setting.
+    """
+    return get_site(settings.SITE_ID)
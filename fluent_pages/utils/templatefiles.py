@@ -0,0 +1,88 @@
+"""
+A cached listing of the template files, for the layout selection.
+
+Walking the template directory can be slow (e.g. on a network filesystem).
+The listing is stored in the cache, together with the modification times of the directories.
+Adding, removing or renaming a file changes the modification time of its directory,
+so the listing is refreshed by only checking the directories, without reading their contents.
+"""
+import hashlib
+import os
+import re
+from django.core.cache import cache
+
+__all__ = ('get_template_choices', 'scan_template_choices')
+
+# The directory modification times are checked on each read.
+CACHE_TIMEOUT = 86400
+
+
+def get_template_choices(path, match=None, recursive=False, allow_files=True, allow_folders=False, refresh=False):
+    """
+    Return the choices for a :class:`~django.forms.FilePathField`, as list of ``(filename, title)`` tuples.
+    Use ``refresh=True`` to scan the directory again.
+    """
+    cachekey = _get_cache_key(path, match, recursive, allow_files, allow_folders)
+    data = None if refresh else cache.get(cachekey)
+    if data is None or _is_changed(data['dirs']):
+        data = scan_template_choices(path, match, recursive, allow_files, allow_folders)
+        cache.set(cachekey, data, CACHE_TIMEOUT)
+    return data['choices']
+
+
+def scan_template_choices(path, match=None, recursive=False, allow_files=True, allow_folders=False):
+    """
+    Walk the directory in the same way :class:`~django.forms.FilePathField` does.
+    Returns a dictionary with the ``choices``, and the modification time of the scanned ``dirs``.
+    """
+    match_re = re.compile(match) if match is not None else None
+    choices = []
+    dirs = {path: _get_mtime(path)}  # also detects creating the directory.
+
+    if recursive:
+        for root, subdirs, files in sorted(os.walk(path)):
+            dirs[root] = _get_mtime(root)
+            if allow_files:
+                for f in files:
+                    if match_re is None or match_re.search(f):
+                        f = os.path.join(root, f)
+                        choices.append((f, f.replace(path, "", 1)))
+            if allow_folders:
+                for f in subdirs:
+                    if f == '__pycache__':
+                        continue
+                    if match_re is None or match_re.search(f):
+                        f = os.path.join(root, f)
+                        choices.append((f, f.replace(path, "", 1)))
+    else:
+        try:
+            for f in sorted(os.listdir(path)):
+                if f == '__pycache__':
+                    continue
+                full_file = os.path.join(path, f)
+                if (((allow_files and os.path.isfile(full_file)) or
+                    (allow_folders and os.path.isdir(full_file))) and
+                    (match_re is None or match_re.search(f))):
+                    choices.append((full_file, f))
+        except OSError:
+            pass
+
+    return {'choices': choices, 'dirs': dirs}
+
+
+def _is_changed(dirs):
+    for dirname, mtime in dirs.iteritems():
+        if _get_mtime(dirname) != mtime:
+            return True
+    return False
+
+
+def _get_mtime(dirname):
+    try:
+        return os.path.getmtime(dirname)
+    except OSError:
+        return None
+
+
+def _get_cache_key(*args):
+    return 'fluent_pages.template_choices.{0}'.format(hashlib.md5(repr(args)).hexdigest())
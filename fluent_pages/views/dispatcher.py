@@ -8,7 +8,11 @@ from django.template.response import TemplateResponse
 from django.utils import translation
 from django.views.generic.base import View
 from fluent_pages import appsettings
+from fluent_pages.extensions import page_type_pool
 from fluent_pages.models import UrlNode
+from fluent_pages.models.caches import get_route_table
+from fluent_pages.utils.identitymap import get_identity_map
+from fluent_pages.views.instrumentation import DispatchTimer, is_instrumentation_enabled
 from django.views.generic import RedirectView
 import re
 
@@ -45,6 +49,15 @@ class CmsPageDispatcher(GetPathMixin, View):
     model = UrlNode
     prefetch_translations = appsettings.FLUENT_PAGES_PREFETCH_TRANSLATIONS
 
+    #: Whether the cached route table is consulted before querying the database.
+    #: Paths which are not found in the table are rejected without a query.
+    #: The table is only used when ``FLUENT_PAGES_CACHE_PAGE_TREE`` is enabled.
+    #: Disable this when :func:`get_queryset` also returns unpublished pages.
+    use_route_table = appsettings.FLUENT_PAGES_CACHE_PAGE_TREE and appsettings.FLUENT_PAGES_FILTER_SITE_ID
+
+    #: The :class:`~fluent_pages.views.instrumentation.DispatchTimer` of the request, when the stages are measured.
+    timer = None
+
 
     def get(self, request, **kwargs):
         """
@@ -53,15 +66,48 @@ class CmsPageDispatcher(GetPathMixin, View):
         self.language_code = self.get_language()
         self.path = self.get_path()
 
+        if not is_instrumentation_enabled():
+            return self._get_response()
+
+        self.timer = DispatchTimer()
+        self.timer.start()
+        try:
+            response = self._get_response()
+        except:
+            self.timer.finish()
+            raise
+        finally:
+            self.timer.stop()  # Stop recording the queries before the response is rendered.
+        return self.timer.finish(response)
+
+
+    def _get_response(self):
         # See which view returns a valid response.
-        for func in (self._get_node, self._get_urlnode_redirect, self._get_appnode, self._get_append_slash_redirect):
-            response = func()
+        stages = (
+            ('node', self._get_node),
+            ('urlnode_redirect', self._get_urlnode_redirect),
+            ('appnode', self._get_appnode),
+            ('append_slash_redirect', self._get_append_slash_redirect),
+        )
+        for stage, func in stages:
+            response = self._timed(stage, func)
             if response:
                 return response
 
         return self._page_not_found()
 
 
+    def _timed(self, stage, func, *args, **kwargs):
+        """
+        Call the function, and measure it when the timer is active.
+        """
+        if self.timer is None:
+            return func(*args, **kwargs)
+
+        with self.timer.stage(stage):
+            return func(*args, **kwargs)
+
+
     def post(self, request, **kwargs):
         """
         Allow POST requests (for forms) to the page.
@@ -107,7 +153,7 @@ class CmsPageDispatcher(GetPathMixin, View):
         # This can be limited or expanded in the future
         qs = self.model.objects.published()
         if self.prefetch_translations:
-            qs = qs.prefetch_related('translations')
+            qs = qs.prefetch_translations()
         return qs
 
 
@@ -119,9 +165,12 @@ class CmsPageDispatcher(GetPathMixin, View):
         language_code = language_code or self.language_code
         qs = self.get_queryset()
 
-        return _try_languages(language_code, UrlNode.DoesNotExist,
-            lambda lang: qs.get_for_path(path, language_code=lang)
-        )
+        def _get_for_path(lang):
+            if self.use_route_table and path not in get_route_table(lang):
+                raise UrlNode.DoesNotExist()  # No need to query the database
+            return qs.get_for_path(path, language_code=lang)
+
+        return _try_languages(language_code, UrlNode.DoesNotExist, _get_for_path)
 
 
     def get_best_match_object(self, path=None, language_code=None):
@@ -134,9 +183,16 @@ class CmsPageDispatcher(GetPathMixin, View):
         # Only check for nodes with custom urlpatterns
         qs = self.get_queryset().url_pattern_types()
 
-        return _try_languages(language_code, UrlNode.DoesNotExist,
-            lambda lang: qs.best_match_for_path(path, language_code=lang)
-        )
+        def _best_match_for_path(lang):
+            if self.use_route_table:
+                # The table also has the content type, only query when one of the levels has URL patterns.
+                routes = get_route_table(lang)
+                url_types = page_type_pool.get_url_pattern_types()
+                if not any(routes.get(level) in url_types for level in qs._split_path_levels(path)):
+                    raise UrlNode.DoesNotExist()
+            return qs.best_match_for_path(path, language_code=lang)
+
+        return _try_languages(language_code, UrlNode.DoesNotExist, _best_match_for_path)
 
 
     def get_plugin(self):
@@ -158,6 +214,7 @@ class CmsPageDispatcher(GetPathMixin, View):
         # and also avoids additional lookup in templatetags.
         # NOTE: django-fluent-blogs actually reads this variable too.
         self.request._current_fluent_page = self.object
+        get_identity_map(self.request).add(self.object, self.path, self.object.get_current_language())
 
         # Before returning the response of an object,
         # check if the plugin overwrites the root url with a custom view.
@@ -172,7 +229,7 @@ class CmsPageDispatcher(GetPathMixin, View):
                 return self._call_url_view(match)
 
         # Let page type plugin handle the request.
-        response = plugin.get_response(self.request, self.object)
+        response = self._timed('get_response', plugin.get_response, self.request, self.object)
         if response is None:
             # Avoid automatic fallback to 404 page in this dispatcher.
             raise ValueError("The method '{0}.get_response()' didn't return an HttpResponse object.".format(plugin.__class__.__name__))
@@ -226,11 +283,12 @@ class CmsPageDispatcher(GetPathMixin, View):
         else:
             # Call application view.
             self.request._current_fluent_page = self.object   # Avoid additional lookup in templatetags
+            get_identity_map(self.request).add(self.object)
             return self._call_url_view(match)
 
 
     def _call_url_view(self, match):
-        response = match.func(self.request, *match.args, **match.kwargs)
+        response = self._timed('app_view', match.func, self.request, *match.args, **match.kwargs)
         if response is None:
             raise RuntimeError("The view '{0}' didn't return an HttpResponse object.".format(match.url_name))
 
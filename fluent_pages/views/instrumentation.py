@@ -0,0 +1,238 @@
+"""
+Timing the stages of the page dispatcher.
+
+The :class:`~fluent_pages.views.dispatcher.CmsPageDispatcher` resolves a page in several stages,
+which are measured separately:
+
+* ``node``: finding the page for the path.
+* ``urlnode_redirect``: finding the page for the path with an extra slash.
+* ``appnode``: finding the nearest page that has URL patterns.
+* ``append_slash_redirect``: resolving the path with an extra slash in the URLconf.
+* ``get_response``: the :func:`~fluent_pages.extensions.PageTypePlugin.get_response` call of the page type.
+* ``app_view``: the view of a page type with URL patterns.
+* ``render``: rendering the ``TemplateResponse``, including the template response middleware.
+
+The time of a nested stage (e.g. ``get_response``) is not included in the stage that calls it (e.g. ``node``).
+The number of database queries is counted as well, using the default database connection.
+The queries are only recorded while the view runs, so the queries of the ``render`` stage are not counted.
+
+The results are sent to the stats backend configured in the ``FLUENT_PAGES_STATS_BACKEND`` setting:
+
+* :class:`StatsdBackend` sends the timings to statsd, using the ``statsd`` package.
+* :class:`MemoryStatsBackend` collects the timings in memory, for example in unit tests.
+
+A backend only needs to implement the ``timing()`` and ``incr()`` methods of a statsd client,
+so a statsd client can be wrapped easily.
+With ``FLUENT_PAGES_SERVER_TIMING = True``, the timings are also added as ``Server-Timing`` response header,
+which is displayed by the network panel of the browser.
+"""
+import threading
+import time
+from django.db import connection
+from fluent_pages import appsettings
+from fluent_pages.utils.load import import_appsetting_class
+
+__all__ = (
+    'get_stats_backend', 'is_instrumentation_enabled', 'BaseStatsBackend', 'StatsdBackend', 'MemoryStatsBackend',
+    'DispatchTimer',
+)
+
+_backend = None
+_backend_path = None
+_backend_lock = threading.Lock()
+
+
+def get_stats_backend():
+    """
+    Return the stats backend of this process, or ``None`` when ``FLUENT_PAGES_STATS_BACKEND`` is not set.
+    """
+    global _backend, _backend_path
+    if _backend_path != appsettings.FLUENT_PAGES_STATS_BACKEND:
+        with _backend_lock:
+            if _backend_path != appsettings.FLUENT_PAGES_STATS_BACKEND:
+                backend_class = import_appsetting_class('FLUENT_PAGES_STATS_BACKEND')
+                _backend = backend_class() if backend_class is not None else None
+                _backend_path = appsettings.FLUENT_PAGES_STATS_BACKEND
+    return _backend
+
+
+def is_instrumentation_enabled():
+    """
+    Return whether the dispatcher should be timed.
+    """
+    return appsettings.FLUENT_PAGES_SERVER_TIMING or get_stats_backend() is not None
+
+
+class BaseStatsBackend(object):
+    """
+    The base class for a stats backend, following the API of a statsd client.
+    """
+    def timing(self, stat, delta):
+        """
+        Record a duration, in milliseconds.
+        """
+        raise NotImplementedError("{0} does not implement timing()".format(self.__class__.__name__))
+
+    def incr(self, stat, count=1):
+        """
+        Increase a counter.
+        """
+        raise NotImplementedError("{0} does not implement incr()".format(self.__class__.__name__))
+
+
+class StatsdBackend(BaseStatsBackend):
+    """
+    Send the timings to statsd.
+    The client is configured with the ``STATSD_HOST``, ``STATSD_PORT`` and ``STATSD_PREFIX`` settings of the ``statsd`` package.
+    """
+    def __init__(self):
+        from statsd.defaults.django import statsd
+        self.client = statsd
+
+    def timing(self, stat, delta):
+        self.client.timing(stat, delta)
+
+    def incr(self, stat, count=1):
+        self.client.incr(stat, count)
+
+
+class MemoryStatsBackend(BaseStatsBackend):
+    """
+    Collect the timings in memory.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def timing(self, stat, delta):
+        self.timings.setdefault(stat, []).append(delta)
+
+    def incr(self, stat, count=1):
+        self.counters[stat] = self.counters.get(stat, 0) + count
+
+    def reset(self):
+        """
+        Remove all collected data.
+        """
+        self.timings.clear()
+        self.counters.clear()
+
+
+class DispatchTimer(object):
+    """
+    Measure the time and number of queries of each stage in a request.
+    """
+    stat_prefix = 'fluent_pages.dispatcher'
+
+    def __init__(self):
+        #: The measured stages, as list of ``(stage, milliseconds, queries)`` tuples.
+        #: The queries are ``None`` for the ``render`` stage.
+        self.stages = []
+        self._stack = []
+        self._start = None
+        self._end_queries = None
+        self._old_debug_cursor = None
+        self._recording = False
+
+    def start(self):
+        """
+        Start measuring the request.
+        """
+        # Let the connection record the queries, like the CaptureQueriesContext of the Django tests does.
+        self._old_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        self._recording = True
+        self._start = self._get_counters()
+
+    def stop(self):
+        """
+        Stop recording the queries, and restore the previous state of the connection.
+        This should be called when the view returns, also when it raises an exception.
+        """
+        if self._recording:
+            self._end_queries = len(connection.queries)
+            connection.use_debug_cursor = self._old_debug_cursor
+            self._recording = False
+
+    def stage(self, name):
+        """
+        Measure a stage, using the ``with`` statement.
+        """
+        return _Stage(self, name)
+
+    def finish(self, response=None):
+        """
+        Report the timings, and add the ``Server-Timing`` header to the response.
+        A ``TemplateResponse`` is reported after it's rendered.
+        """
+        self.stop()
+        if response is not None and hasattr(response, 'add_post_render_callback') and not response.is_rendered:
+            render_start = time.time()
+            response.add_post_render_callback(lambda response: self._finish_render(response, render_start))
+        else:
+            self._finish(response)
+        return response
+
+    def _finish_render(self, response, render_start):
+        # The queries are no longer recorded, only the time is measured.
+        self.stages.append(('render', (time.time() - render_start) * 1000, None))
+        self._finish(response)
+
+    def _finish(self, response):
+        total_time = (time.time() - self._start[0]) * 1000
+        total_queries = self._end_queries - self._start[1]
+
+        backend = get_stats_backend()
+        if backend is not None:
+            for name, duration, queries in self.stages:
+                backend.timing('{0}.{1}'.format(self.stat_prefix, name), duration)
+                if queries is not None:
+                    backend.incr('{0}.{1}.queries'.format(self.stat_prefix, name), queries)
+            backend.timing('{0}.total'.format(self.stat_prefix), total_time)
+            backend.incr('{0}.total.queries'.format(self.stat_prefix), total_queries)
+
+        if response is not None and appsettings.FLUENT_PAGES_SERVER_TIMING:
+            metrics = [_format_metric(name, duration, queries) for name, duration, queries in self.stages]
+            metrics.append(_format_metric('total', total_time, total_queries))
+            response['Server-Timing'] = ', '.join(metrics)
+
+    def _add_stage(self, name, start, child_time=0, child_queries=0):
+        end = self._get_counters()
+        duration = (end[0] - start[0]) * 1000
+        queries = end[1] - start[1]
+        self.stages.append((name, duration - child_time, queries - child_queries))
+        return duration, queries
+
+    def _get_counters(self):
+        return time.time(), len(connection.queries)
+
+
+def _format_metric(name, duration, queries):
+    # A metric of the Server-Timing header
+    if queries is None:
+        return '{0};dur={1:.1f}'.format(name, duration)
+    return '{0};dur={1:.1f};desc="{2} queries"'.format(name, duration, queries)
+
+
+class _Stage(object):
+    """
+    The context manager returned by :func:`DispatchTimer.stage`.
+    """
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.child_time = 0
+        self.child_queries = 0
+
+    def __enter__(self):
+        self.start = self.timer._get_counters()
+        self.timer._stack.append(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer._stack.pop()
+        duration, queries = self.timer._add_stage(self.name, self.start, self.child_time, self.child_queries)
+        if self.timer._stack:
+            # Exclude the nested stage from the time of the parent.
+            parent = self.timer._stack[-1]
+            parent.child_time += duration
+            parent.child_queries += queries
@@ -28,6 +28,7 @@ if not settings.configured:
             'django.contrib.sites',
             'django.contrib.admin',
             'django.contrib.sessions',
+            'django.contrib.sitemaps',
             'fluent_pages',
             'fluent_pages.tests.testapp',
             'mptt',
@@ -36,6 +37,7 @@ if not settings.configured:
         ),
         TEST_RUNNER='django.test.simple.DjangoTestSuiteRunner',   # for Django 1.6, see https://docs.djangoproject.com/en/dev/releases/1.6/#new-test-runner
         SITE_ID = 4,
+        STATIC_URL = '/static/',
         PARLER_LANGUAGES = {
             4: (
                 {'code': 'nl', 'fallback': 'en'},